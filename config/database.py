@@ -4,29 +4,50 @@ Async SQLAlchemy engine, session factory, and base model.
 Uses asyncpg driver for PostgreSQL with PostGIS support.
 """
 
+import asyncio
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Callable
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
-from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy.pool import NullPool
+from sqlalchemy.orm import DeclarativeBase, Session
 
 from config.settings import settings
 
 
+# ── Pool Sizing ───────────────────────────────────────────────
+# Each uvicorn worker is its own process with its own pool, so the configured
+# totals are split across workers (DEBUG runs a single worker — see main.py).
+_WORKERS = 1 if settings.DEBUG else max(1, settings.WORKERS)
+POOL_SIZE = max(1, settings.DATABASE_POOL_SIZE // _WORKERS)
+MAX_OVERFLOW = settings.DATABASE_MAX_OVERFLOW // _WORKERS
+
 # ── Engine ────────────────────────────────────────────────────
 engine = create_async_engine(
     settings.DATABASE_URL,
-    pool_size=settings.DATABASE_POOL_SIZE,
-    max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
     pool_timeout=settings.DATABASE_POOL_TIMEOUT,
-    pool_pre_ping=True,          # Detect stale connections
-    pool_recycle=3600,           # Recycle connections every hour
+    # Pre-ping costs a SELECT 1 per checkout; off by default and re-enabled via
+    # DATABASE_PRE_PING during network incidents. Stale connections are instead
+    # caught by recycling + server-side TCP keepalives.
+    pool_pre_ping=settings.DATABASE_PRE_PING,
+    pool_recycle=settings.DATABASE_POOL_RECYCLE,
     echo=settings.DEBUG,         # Log SQL in debug mode
+    query_cache_size=1200,       # Compiled-SQL cache; default 500 churns across all routers
+    connect_args={
+        "timeout": 10,
+        "command_timeout": 30,
+        "server_settings": {
+            "tcp_keepalives_idle": "60",
+            "tcp_keepalives_interval": "10",
+            "tcp_keepalives_count": "5",
+        },
+    },
 )
 
 # ── Session Factory ───────────────────────────────────────────
@@ -45,11 +66,66 @@ class Base(DeclarativeBase):
     pass
 
 
+# ── Post-commit Hooks ─────────────────────────────────────────
+# Side effects that must only be observed once a row is durable — Celery
+# enqueues, Redis publishes, cache invalidation — are queued on the session
+# and fired by its after_commit event. A rollback discards them and fires the
+# after_rollback queue instead, for undoing claims taken ahead of the write.
+
+_pending_tasks: set[asyncio.Task] = set()
+
+
+def run_after_commit(session: AsyncSession, callback: Callable[[], object]) -> None:
+    """
+    Run `callback` once `session` commits. Plain callables run inline; if it
+    returns a coroutine, that is scheduled on the running loop.
+    """
+    session.sync_session.info.setdefault("after_commit", []).append(callback)
+
+
+def run_after_rollback(session: AsyncSession, callback: Callable[[], object]) -> None:
+    """Like run_after_commit, but for when the transaction rolls back."""
+    session.sync_session.info.setdefault("after_rollback", []).append(callback)
+
+
+async def _guarded(coro) -> None:
+    try:
+        await coro
+    except Exception as e:
+        print(f"Transaction hook failed: {e}")
+
+
+def _fire(callbacks) -> None:
+    for callback in callbacks:
+        try:
+            result = callback()
+        except Exception as e:
+            print(f"Transaction hook failed: {e}")
+            continue
+        if asyncio.iscoroutine(result):
+            task = asyncio.get_running_loop().create_task(_guarded(result))
+            _pending_tasks.add(task)
+            task.add_done_callback(_pending_tasks.discard)
+
+
+@event.listens_for(Session, "after_commit")
+def _fire_after_commit(session: Session) -> None:
+    session.info.pop("after_rollback", None)
+    _fire(session.info.pop("after_commit", ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _fire_after_rollback(session: Session) -> None:
+    session.info.pop("after_commit", None)
+    _fire(session.info.pop("after_rollback", ()))
+
+
 # ── Dependency ────────────────────────────────────────────────
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     FastAPI dependency: yields an async database session.
-    Auto-commits on success, rolls back on error.
+    Auto-commits on success, rolls back on error. The `async with` block
+    returns the connection to the pool on exit.
 
     Usage:
         @router.get("/users")
@@ -63,8 +139,6 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         except Exception:
             await session.rollback()
             raise
-        finally:
-            await session.close()
 
 
 @asynccontextmanager
@@ -77,8 +151,6 @@ async def get_db_context() -> AsyncGenerator[AsyncSession, None]:
         except Exception:
             await session.rollback()
             raise
-        finally:
-            await session.close()
 
 
 async def init_db() -> None:
@@ -93,6 +165,12 @@ async def init_db() -> None:
         )
         await conn.run_sync(Base.metadata.create_all)
 
+    # Pre-warm the pool so the first requests don't pay the connect cost
+    warm = min(settings.DATABASE_POOL_MIN, POOL_SIZE)
+    conns = await asyncio.gather(*(engine.connect() for _ in range(warm)))
+    for c in conns:
+        await c.close()
+
 
 async def close_db() -> None:
     """Dispose engine. Run during app shutdown."""
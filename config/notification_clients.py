@@ -0,0 +1,75 @@
+"""
+config/notification_clients.py
+Process-wide clients for the notification providers (FCM, Twilio, Resend).
+Built once per process (API worker or Celery worker) and reused, so sends
+ride warm keep-alive connections instead of a fresh TLS handshake each time.
+"""
+
+import threading
+
+from config.settings import settings
+
+# Per-request deadline for every provider call, in seconds. Set on the SDK
+# clients themselves: the caller's thread blocks until the HTTP call returns.
+PROVIDER_TIMEOUT = 10
+
+_lock = threading.Lock()
+_firebase_app = None
+_twilio_client = None
+_resend_ready = False
+
+
+def get_firebase_app():
+    """Default firebase_admin app; its messaging HTTP session is reused across sends."""
+    global _firebase_app
+    if _firebase_app is None:
+        with _lock:
+            if _firebase_app is None:
+                import firebase_admin
+                from firebase_admin import credentials
+
+                if firebase_admin._apps:
+                    _firebase_app = firebase_admin.get_app()
+                else:
+                    cred = credentials.Certificate(settings.FIREBASE_CREDENTIALS_PATH)
+                    _firebase_app = firebase_admin.initialize_app(
+                        cred, {"httpTimeout": PROVIDER_TIMEOUT}
+                    )
+    return _firebase_app
+
+
+def get_twilio_client():
+    """Twilio REST client backed by one pooled requests.Session."""
+    global _twilio_client
+    if _twilio_client is None:
+        with _lock:
+            if _twilio_client is None:
+                from twilio.http.http_client import TwilioHttpClient
+                from twilio.rest import Client
+
+                _twilio_client = Client(
+                    settings.TWILIO_ACCOUNT_SID,
+                    settings.TWILIO_AUTH_TOKEN,
+                    http_client=TwilioHttpClient(pool_connections=True, timeout=PROVIDER_TIMEOUT),
+                )
+    return _twilio_client
+
+
+def get_resend():
+    """The resend module with its API key set once, not on every send."""
+    global _resend_ready
+    import resend
+
+    if not _resend_ready:
+        resend.api_key = settings.RESEND_API_KEY
+        _resend_ready = True
+    return resend
+
+
+def init_notification_clients() -> None:
+    """Eagerly build the clients at startup. Best-effort — senders retry lazily."""
+    for init in (get_firebase_app, get_twilio_client, get_resend):
+        try:
+            init()
+        except Exception as e:
+            print(f"⚠️  {init.__name__} failed: {e}")
@@ -0,0 +1,27 @@
+"""
+config/razorpay_client.py
+Process-wide Razorpay client. Built on first use and reused, so order,
+refund and payout calls share one requests.Session (keep-alive + TLS reuse).
+"""
+
+import threading
+
+from config.settings import settings
+
+_lock = threading.Lock()
+_client = None
+
+
+def get_razorpay_client():
+    """The shared razorpay.Client; raises ImportError if the SDK is missing."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                import razorpay
+
+                _client = razorpay.Client(
+                    auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
+                )
+    return _client
+
@@ -4,29 +4,130 @@ Async Redis client for caching, slot locking, JWT deny-list,
 geo queries, and pub/sub (Socket.io adapter).
 """
 
-import json
+import uuid
+from datetime import datetime, timezone
 from typing import Any, Optional
+
+import orjson
 import redis.asyncio as aioredis
+from redis.commands.core import AsyncScript
 
 from config.settings import settings
 
 
+# ── Lua Scripts ───────────────────────────────────────────────
+# Token bucket: `limit` tokens refilled evenly over `window_ms`, stored as a
+# hash {tokens, ts}. Refill + take + TTL happen atomically in one round-trip,
+# paced per millisecond instead of resetting on a coarse 60s window.
+# Uses the server clock (TIME) so all workers agree on "now".
+# ARGV[1] = limit, ARGV[2] = window_ms. Returns 1 if allowed, 0 if limited.
+RATE_LIMIT_LUA = """
+local limit = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or limit
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(limit, tokens + (now - ts) * limit / window_ms)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], window_ms)
+return allowed
+"""
+
+# Slot locks are hashes (booking_id, user_id, locked_at). HSET has no NX
+# form for a whole key, so create-if-absent + TTL is done in one script.
+# ARGV[1] = TTL seconds, ARGV[2..] = field/value pairs.
+LOCK_SLOT_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+# Compare-and-delete: only the booking that holds the slot lock may release it,
+# so a late release can't drop a lock re-acquired by another booking after TTL.
+RELEASE_SLOT_LUA = """
+if redis.call('HGET', KEYS[1], 'booking_id') == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Live location update + Postgres write debounce. Always GEOADDs the point;
+# returns 1 (caller should persist) only when no DB write is remembered within
+# the TTL or the pandit moved at least ARGV[5] metres since the last one.
+# KEYS[1] = GEO set, KEYS[2] = last-persisted hash {lng, lat}
+# ARGV[1] = lng, ARGV[2] = lat, ARGV[3] = member, ARGV[4] = TTL s, ARGV[5] = min metres
+LOCATION_DEBOUNCE_LUA = """
+redis.call('GEOADD', KEYS[1], ARGV[1], ARGV[2], ARGV[3])
+local lng, lat = tonumber(ARGV[1]), tonumber(ARGV[2])
+local last = redis.call('HMGET', KEYS[2], 'lng', 'lat')
+if last[1] then
+    local rad = math.pi / 180
+    local dlat = (lat - tonumber(last[2])) * rad
+    local dlng = (lng - tonumber(last[1])) * rad
+    local a = math.sin(dlat / 2) ^ 2
+        + math.cos(tonumber(last[2]) * rad) * math.cos(lat * rad) * math.sin(dlng / 2) ^ 2
+    local dist = 2 * 6371000 * math.asin(math.sqrt(a))
+    if dist < tonumber(ARGV[5]) then
+        return 0
+    end
+end
+redis.call('HSET', KEYS[2], 'lng', ARGV[1], 'lat', ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return 1
+"""
+
+# Decrement a cached counter only if it is cached (plain DECRBY would create it
+# at -n), never going below zero; the key keeps its TTL. ARGV[1] = amount.
+DECR_IF_EXISTS_LUA = """
+local value = tonumber(redis.call('GET', KEYS[1]))
+if not value then
+    return -1
+end
+local left = math.max(0, value - tonumber(ARGV[1]))
+redis.call('SET', KEYS[1], left, 'KEEPTTL')
+return left
+"""
+
+
 # ── Global client (initialized on startup) ───────────────────
 redis_client: Optional[aioredis.Redis] = None
+rate_limit_script: Optional[AsyncScript] = None
+lock_slot_script: Optional[AsyncScript] = None
+release_slot_script: Optional[AsyncScript] = None
+location_debounce_script: Optional[AsyncScript] = None
+decr_if_exists_script: Optional[AsyncScript] = None
 
 
 async def init_redis() -> None:
     """Initialize the Redis connection pool."""
-    global redis_client
+    global redis_client, rate_limit_script, lock_slot_script, release_slot_script
+    global location_debounce_script, decr_if_exists_script
     redis_client = aioredis.from_url(
         settings.REDIS_URL,
         encoding="utf-8",
         decode_responses=True,
         max_connections=50,
     )
-    # Test connection
+    # Test connection — fail startup here so get_redis() never has to check
     await redis_client.ping()
 
+    # Scripts are sent once, then replayed via EVALSHA
+    rate_limit_script = redis_client.register_script(RATE_LIMIT_LUA)
+    lock_slot_script = redis_client.register_script(LOCK_SLOT_LUA)
+    release_slot_script = redis_client.register_script(RELEASE_SLOT_LUA)
+    location_debounce_script = redis_client.register_script(LOCATION_DEBOUNCE_LUA)
+    decr_if_exists_script = redis_client.register_script(DECR_IF_EXISTS_LUA)
+
 
 async def close_redis() -> None:
     """Close Redis connection pool."""
@@ -35,11 +136,13 @@ async def close_redis() -> None:
         await redis_client.aclose()
 
 
-def get_redis() -> aioredis.Redis:
-    """FastAPI dependency to get Redis client."""
-    if not redis_client:
-        raise RuntimeError("Redis not initialized. Call init_redis() first.")
-    return redis_client
+async def get_redis() -> aioredis.Redis:
+    """
+    FastAPI dependency to get Redis client.
+    Async so FastAPI awaits it inline instead of dispatching to the threadpool.
+    The client is guaranteed by init_redis() at startup, so no None-check here.
+    """
+    return redis_client  # type: ignore[return-value]
 
 
 # ── Cache Helpers ─────────────────────────────────────────────
@@ -52,44 +155,73 @@ class RedisCache:
     async def get(self, key: str) -> Optional[Any]:
         value = await self.client.get(key)
         if value:
-            return json.loads(value)
+            return orjson.loads(value)
         return None
 
     async def set(self, key: str, value: Any, ttl: int = settings.REDIS_CACHE_TTL) -> None:
-        await self.client.setex(key, ttl, json.dumps(value, default=str))
+        # orjson serializes datetime/UUID natively; default=str covers Decimal
+        await self.client.setex(key, ttl, orjson.dumps(value, default=str))
 
     async def delete(self, key: str) -> None:
         await self.client.delete(key)
 
-    async def delete_pattern(self, pattern: str) -> int:
-        """Delete all keys matching pattern. Use carefully in production."""
-        keys = await self.client.keys(pattern)
-        if keys:
-            return await self.client.delete(*keys)
-        return 0
+    async def delete_pattern(self, pattern: str, batch_size: int = 500) -> int:
+        """
+        Delete all keys matching pattern.
+        Walks the keyspace with SCAN (never blocks Redis like KEYS) and
+        deletes in pipelined batches of batch_size.
+        """
+        deleted = 0
+        batch: list[str] = []
+        async for key in self.client.scan_iter(match=pattern, count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                deleted += await self._delete_batch(batch)
+                batch.clear()
+        if batch:
+            deleted += await self._delete_batch(batch)
+        return deleted
+
+    async def _delete_batch(self, keys: list[str]) -> int:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.delete(key)
+            results = await pipe.execute()
+        return sum(results)
 
     # ── Slot Locking ─────────────────────────────────────────
-    async def lock_slot(self, pandit_id: str, slot_datetime: str, booking_id: str) -> bool:
+    async def lock_slot(
+        self,
+        pandit_id: str,
+        slot_datetime: str,
+        booking_id: str,
+        user_id: Optional[str] = None,
+    ) -> bool:
         """
-        Atomic slot lock using SET NX (set if not exists).
+        Atomic slot lock: a hash created only if the key doesn't exist, with TTL.
+        booking_id identifies the owner — release_slot() compares against it.
         Returns True if lock acquired, False if slot already locked.
         """
         key = f"slot_lock:{pandit_id}:{slot_datetime}"
-        result = await self.client.set(
-            key,
-            booking_id,
-            ex=settings.REDIS_SLOT_LOCK_TTL,
-            nx=True,  # Only set if key doesn't exist
-        )
-        return result is True
+        args = [
+            settings.REDIS_SLOT_LOCK_TTL,
+            "booking_id", booking_id,
+            "user_id", user_id or "",
+            "locked_at", datetime.now(timezone.utc).isoformat(),
+        ]
+        result = await lock_slot_script(keys=[key], args=args, client=self.client)
+        return result == 1
 
-    async def release_slot(self, pandit_id: str, slot_datetime: str) -> None:
+    async def release_slot(self, pandit_id: str, slot_datetime: str, booking_id: str) -> bool:
+        """Release the slot lock only if booking_id still owns it."""
         key = f"slot_lock:{pandit_id}:{slot_datetime}"
-        await self.client.delete(key)
+        deleted = await release_slot_script(keys=[key], args=[booking_id], client=self.client)
+        return deleted == 1
 
-    async def get_slot_lock(self, pandit_id: str, slot_datetime: str) -> Optional[str]:
+    async def get_slot_lock(self, pandit_id: str, slot_datetime: str) -> Optional[dict]:
+        """Lock metadata (booking_id, user_id, locked_at) in one HGETALL, or None."""
         key = f"slot_lock:{pandit_id}:{slot_datetime}"
-        return await self.client.get(key)
+        return await self.client.hgetall(key) or None
 
     # ── JWT Deny List ─────────────────────────────────────────
     async def revoke_token(self, jti: str, ttl_seconds: int) -> None:
@@ -99,11 +231,82 @@ class RedisCache:
     async def is_token_revoked(self, jti: str) -> bool:
         return await self.client.exists(f"jwt_revoked:{jti}") == 1
 
+    # ── Per-user Cache Versions ───────────────────────────────
+    async def get_user_version(self, user_id: str) -> Optional[str]:
+        return await self.client.get(f"user_ver:{user_id}")
+
+    async def bump_user_version(self, user_id: str, ttl: int = 3600) -> None:
+        """
+        Stale every worker's in-process cache entries for the user. The TTL
+        only has to outlive those entries; an expired key reads as a change too.
+        """
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.incr(f"user_ver:{user_id}")
+            pipe.expire(f"user_ver:{user_id}", ttl)
+            await pipe.execute()
+
     # ── Geo Queries (Real-time nearby pandits) ────────────────
     async def add_pandit_location(self, pandit_id: str, lng: float, lat: float) -> None:
         """Update pandit's real-time location in Redis GEO set."""
         await self.client.geoadd("pandits_geo", [lng, lat, pandit_id])
 
+    async def update_pandit_location(
+        self,
+        pandit_id: str,
+        lng: float,
+        lat: float,
+        persist_every: int = 900,
+        min_move_m: float = 50,
+    ) -> bool:
+        """
+        Update the live GEO position and decide, atomically, whether Postgres
+        needs the point too. True at most once per `persist_every` seconds
+        unless the pandit has moved `min_move_m` metres since the last write.
+        """
+        persist = await location_debounce_script(
+            keys=["pandits_geo", f"geo:lastdb:{pandit_id}"],
+            args=[lng, lat, pandit_id, persist_every, min_move_m],
+            client=self.client,
+        )
+        return persist == 1
+
+    async def add_pandit_locations_bulk(
+        self,
+        items: list[tuple[str, float, float]],
+        chunk_size: int = 1000,
+        key: str = "pandits_geo",
+    ) -> None:
+        """
+        Bulk-load (pandit_id, lng, lat) tuples into the GEO set.
+        One variadic GEOADD per chunk_size members, all chunks in one pipeline.
+        """
+        if not items:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for i in range(0, len(items), chunk_size):
+                flat = []
+                for pandit_id, lng, lat in items[i:i + chunk_size]:
+                    flat.extend((lng, lat, pandit_id))
+                pipe.geoadd(key, flat)
+            await pipe.execute()
+
+    async def replace_pandit_locations(self, items: list[tuple[str, float, float]]) -> None:
+        """
+        Swap the GEO set for exactly `items`. Built under a scratch key and
+        RENAMEd over pandits_geo, so readers never see a partial set and
+        members missing from `items` are dropped.
+        """
+        if not items:
+            await self.client.delete("pandits_geo")
+            return
+        scratch = f"pandits_geo:rebuild:{uuid.uuid4().hex}"
+        try:
+            await self.add_pandit_locations_bulk(items, key=scratch)
+            await self.client.rename(scratch, "pandits_geo")
+        except Exception:
+            await self.client.delete(scratch)
+            raise
+
     async def get_nearby_pandits(
         self,
         lat: float,
@@ -112,7 +315,7 @@ class RedisCache:
         count: int = 50,
     ) -> list[dict]:
         """Get pandit IDs within radius_km of given coordinates."""
-        results = await self.client.georadiusbymember(
+        results = await self.client.georadius(
             "pandits_geo",
             lng, lat,
             radius_km,
@@ -123,19 +326,57 @@ class RedisCache:
             sort="ASC",
         )
         return [
-            {"pandit_id": r[0], "distance_km": float(r[1]), "coords": r[2]}
-            for r in results
+            {"pandit_id": pandit_id, "distance_km": dist, "coords": coords}
+            for pandit_id, dist, coords in results
         ]
 
+    # ── Unread Notification Counts ────────────────────────────
+    async def get_unread_count(self, user_id: str) -> Optional[int]:
+        value = await self.client.get(f"unread:{user_id}")
+        return int(value) if value is not None else None
+
+    async def set_unread_count(self, user_id: str, count: int, ttl: int = 30) -> None:
+        await self.client.setex(f"unread:{user_id}", ttl, count)
+
+    async def decr_unread_count(self, user_id: str, amount: int = 1) -> None:
+        """Keep a cached count warm after marking `amount` rows read."""
+        await decr_if_exists_script(
+            keys=[f"unread:{user_id}"], args=[amount], client=self.client
+        )
+
+    async def invalidate_unread_count(self, user_id: str) -> None:
+        """Drop the cached count; the next poll recounts from Postgres."""
+        await self.client.delete(f"unread:{user_id}")
+
+    async def publish_notification(self, user_id: str, payload: bytes) -> None:
+        """Fan a new notification out to the user's /notifications/ws sockets."""
+        await self.client.publish(f"notif:{user_id}", payload)
+
+    # ── Notification Dedup ────────────────────────────────────
+    async def claim_notification(
+        self, user_id: str, notification_type: str, booking_id: Optional[str], ttl: int
+    ) -> bool:
+        """
+        Claim a (user, type, booking) notification event for `ttl` seconds.
+        False if the same event was already claimed inside the window.
+        """
+        return bool(await self.client.set(
+            f"notif:dedup:{user_id}:{notification_type}:{booking_id or '-'}", 1, nx=True, ex=ttl
+        ))
+
+    async def release_notification(
+        self, user_id: str, notification_type: str, booking_id: Optional[str]
+    ) -> None:
+        """Give a claim back, e.g. when the write it guarded rolled back."""
+        await self.client.delete(f"notif:dedup:{user_id}:{notification_type}:{booking_id or '-'}")
+
     # ── Rate Limiting ─────────────────────────────────────────
     async def check_rate_limit(self, key: str, limit: int, window_seconds: int = 60) -> bool:
         """
-        Sliding window rate limiter.
+        Token-bucket rate limiter (limit requests per window_seconds).
         Returns True if request is allowed, False if rate limited.
         """
-        pipe = self.client.pipeline()
-        pipe.incr(key)
-        pipe.expire(key, window_seconds)
-        results = await pipe.execute()
-        current_count = results[0]
-        return current_count <= limit
+        allowed = await rate_limit_script(
+            keys=[key], args=[limit, window_seconds * 1000], client=self.client
+        )
+        return allowed == 1
@@ -4,7 +4,7 @@ Application settings loaded from environment variables.
 Uses Pydantic BaseSettings for validation and type safety.
 """
 
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from typing import List, Optional
 from pydantic import field_validator, AnyHttpUrl
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -32,9 +32,12 @@ class Settings(BaseSettings):
 
     # ── Database ─────────────────────────────────────────────
     DATABASE_URL: str
-    DATABASE_POOL_SIZE: int = 20
-    DATABASE_MAX_OVERFLOW: int = 40
+    DATABASE_POOL_SIZE: int = 20        # Total across all workers
+    DATABASE_POOL_MIN: int = 5          # Connections pre-warmed per worker
+    DATABASE_MAX_OVERFLOW: int = 40     # Total across all workers
     DATABASE_POOL_TIMEOUT: int = 30
+    DATABASE_POOL_RECYCLE: int = 1800   # Seconds before a connection is replaced
+    DATABASE_PRE_PING: bool = False     # SELECT 1 on every checkout
 
     # ── Redis ────────────────────────────────────────────────
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -108,14 +111,21 @@ class Settings(BaseSettings):
     BOOKING_ACCEPT_DEADLINE_HOURS: int = 2
     PANDIT_NEARBY_DEFAULT_RADIUS_KM: float = 25.0
 
-    @property
+    # Derived values are computed on first access and then stored on the
+    # instance, so later reads are plain attribute loads (no re-split).
+    @cached_property
     def allowed_origins_list(self) -> List[str]:
         return [o.strip() for o in self.ALLOWED_ORIGINS.split(",")]
 
-    @property
+    @cached_property
     def is_production(self) -> bool:
         return self.APP_ENV == "production"
 
+    @cached_property
+    def commission_bps(self) -> int:
+        """Platform commission in basis points — money math stays integer paise."""
+        return round(self.PLATFORM_COMMISSION_PERCENT * 100)
+
 
 @lru_cache()
 def get_settings() -> Settings:
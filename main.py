@@ -4,32 +4,47 @@ FastAPI application entry point.
 Registers all routers, middleware, startup/shutdown events.
 """
 
+import asyncio
+import logging
 import time
-import uuid
 from contextlib import asynccontextmanager
 
+import orjson
+
 from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from starlette.middleware.sessions import SessionMiddleware
+from starlette.routing import Route
 
-from config.database import close_db, init_db
+from config.database import MAX_OVERFLOW, POOL_SIZE, AsyncSessionLocal, close_db, init_db
+import config.redis_client as redis_state
+from config.notification_clients import init_notification_clients
 from config.redis_client import close_redis, init_redis
 from config.settings import settings
+from shared.middleware.core import CoreMiddleware, FastPathMiddleware
+from shared.models.models import Pooja, PoojaCategory
 
 # Service routers
 from services.auth.router import router as auth_router
 from services.pandit.router import router as pandit_router
 from services.booking.router import router as booking_router
-from services.search.router import router as search_router
+from services.search.router import close_es_client, router as search_router
 from services.payment.router import router as payment_router
 from services.notification.router import router as notification_router
 from services.user.router import router as user_router
 from services.review.router import router as review_router
 from services.admin.router import router as admin_router
 
+logger = logging.getLogger(__name__)
+
+# Statements built once at import and reused on every call
+_SELECT_ONE = text("SELECT 1")
+
 
 # ── Lifespan (startup/shutdown) ───────────────────────────────
 
@@ -40,11 +55,14 @@ async def lifespan(app: FastAPI):
 
     # Initialize connections
     await init_db()
-    print("✅ Database connected")
+    print(f"✅ Database connected (pool {POOL_SIZE}+{MAX_OVERFLOW} per worker)")
 
     await init_redis()
     print("✅ Redis connected")
 
+    # Notification provider clients — built once, reused by every send
+    init_notification_clients()
+
     # Seed initial data (poojas, etc.) — only in dev
     if settings.APP_ENV == "development":
         await seed_initial_data()
@@ -53,11 +71,117 @@ async def lifespan(app: FastAPI):
     yield
 
     # Cleanup
+    await close_es_client()
     await close_redis()
     await close_db()
     print("👋 Server shutdown complete")
 
 
+# ── Health Check ──────────────────────────────────────────────
+# Probes are memoized for HEALTH_CACHE_TTL seconds so load-balancer polling
+# across replicas doesn't turn into constant DB/Redis traffic.
+
+HEALTH_CACHE_TTL = 1.0
+_health_cache: tuple[float, dict] | None = None
+_health_lock = asyncio.Lock()
+
+
+async def _get_health_checks() -> dict:
+    global _health_cache
+    if _health_cache and time.monotonic() - _health_cache[0] < HEALTH_CACHE_TTL:
+        return _health_cache[1]
+
+    async with _health_lock:
+        # Another caller may have refreshed while we waited for the lock
+        if _health_cache and time.monotonic() - _health_cache[0] < HEALTH_CACHE_TTL:
+            return _health_cache[1]
+        checks = await _run_health_checks()
+        _health_cache = (time.monotonic(), checks)
+        return checks
+
+
+async def _check_db() -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(_SELECT_ONE)
+
+
+async def _check_redis() -> None:
+    # Read through the module — redis_client is rebound by init_redis()
+    if redis_state.redis_client:
+        await redis_state.redis_client.ping()
+
+
+async def _run_health_checks() -> dict:
+    checks = {"status": "ok", "version": settings.APP_VERSION}
+
+    # DB and Redis probes are independent — run them concurrently
+    db_result, redis_result = await asyncio.gather(
+        _check_db(), _check_redis(), return_exceptions=True
+    )
+    for name, result in (("database", db_result), ("redis", redis_result)):
+        if isinstance(result, BaseException):
+            checks[name] = "error"
+            checks["status"] = "degraded"
+        else:
+            checks[name] = "ok"
+
+    return checks
+
+
+# ── Exception Handlers ────────────────────────────────────────
+
+def _error_prefix(message: str) -> bytes:
+    """Serialized error body up to the request_id value."""
+    return orjson.dumps({"detail": message})[:-1] + b',"request_id":'
+
+
+# Exact-type lookup (no isinstance chain) for failures that aren't our bug.
+# Production bodies are pre-serialized; only the request id is appended per error.
+_DEFAULT_ERROR = (500, _error_prefix("An internal server error occurred"))
+_EXC_STATUS = {
+    TimeoutError: (504, _error_prefix("An upstream service timed out")),
+    ConnectionRefusedError: (503, _error_prefix("A dependent service is unavailable")),
+}
+
+
+async def global_exception_handler(request: Request, exc: Exception):
+    """Catch-all exception handler. Never expose stack traces in production."""
+    status_code, body_prefix = _EXC_STATUS.get(type(exc), _DEFAULT_ERROR)
+    request_id = getattr(request.state, "request_id", None)
+    # Traceback is only formatted if the configured handler actually emits it
+    logger.error("Unhandled exception on %s %s", request.method, request.url.path, exc_info=exc)
+
+    if settings.DEBUG:
+        return ORJSONResponse(
+            status_code=status_code,
+            content={"detail": str(exc), "request_id": request_id},
+        )
+    return Response(
+        content=body_prefix + orjson.dumps(request_id) + b"}",
+        status_code=status_code,
+        media_type="application/json",
+    )
+
+
+# ── Routes ────────────────────────────────────────────────────
+
+async def health_check(scope, receive, send):
+    """Health check (public). Bare ASGI app — served by FastPathMiddleware."""
+    checks = await _get_health_checks()
+    status_code = 200 if checks["status"] == "ok" else 503
+    response = ORJSONResponse(content=checks, status_code=status_code)
+    await response(scope, receive, send)
+
+
+async def root():
+    return {
+        "name": settings.APP_NAME,
+        "version": settings.APP_VERSION,
+        "docs": "/docs",
+        "health": "/health",
+    }
+
+
 # ── App Factory ───────────────────────────────────────────────
 
 def create_app() -> FastAPI:
@@ -87,6 +211,8 @@ Get a token via the `/auth/google` OAuth flow.
         docs_url="/docs",
         redoc_url="/redoc",
         openapi_url="/openapi.json",
+        # orjson renders UUID/datetime natively and is several times faster than stdlib json
+        default_response_class=ORJSONResponse,
         lifespan=lifespan,
     )
 
@@ -101,8 +227,9 @@ Get a token via the `/auth/google` OAuth flow.
         expose_headers=["X-Request-ID", "X-Process-Time"],
     )
 
-    # GZip compression
-    app.add_middleware(GZipMiddleware, minimum_size=500)
+    # GZip compression — only large list payloads are worth the CPU. Level 6
+    # (zlib's default) instead of Starlette's 9: near-identical ratio on JSON.
+    app.add_middleware(GZipMiddleware, minimum_size=4096, compresslevel=6)
 
     # Session (needed for OAuth state parameter)
     app.add_middleware(
@@ -114,123 +241,17 @@ Get a token via the `/auth/google` OAuth flow.
     )
 
     # ── Custom Middleware ──────────────────────────────────────────
+    # Request ID + process time + rate limiting (single pure-ASGI pass)
+    app.add_middleware(CoreMiddleware)
 
-    @app.middleware("http")
-    async def request_id_middleware(request: Request, call_next):
-        """Add unique X-Request-ID to every request for distributed tracing."""
-        request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
-        request.state.request_id = request_id
-        response = await call_next(request)
-        response.headers["X-Request-ID"] = request_id
-        return response
-
-    @app.middleware("http")
-    async def process_time_middleware(request: Request, call_next):
-        """Track and expose request processing time."""
-        start = time.perf_counter()
-        response = await call_next(request)
-        process_time = round((time.perf_counter() - start) * 1000, 2)
-        response.headers["X-Process-Time"] = f"{process_time}ms"
-        return response
-
-    @app.middleware("http")
-    async def rate_limit_middleware(request: Request, call_next):
-        """
-        Simple rate limiter. In production, use Kong rate limiting plugin.
-        Skips rate limiting for health checks and webhook endpoints.
-        """
-        skip_paths = {"/health", "/payments/webhook", "/docs", "/redoc", "/openapi.json"}
-        if request.url.path in skip_paths:
-            return await call_next(request)
-
-        try:
-            from config.redis_client import redis_client
-            if redis_client:
-                # Get user identity for rate limiting key
-                auth_header = request.headers.get("Authorization", "")
-                if auth_header.startswith("Bearer "):
-                    key = f"rate:{auth_header[7:20]}"
-                    limit = settings.RATE_LIMIT_PER_MINUTE
-                else:
-                    client_ip = request.client.host if request.client else "unknown"
-                    key = f"rate:unauth:{client_ip}"
-                    limit = settings.RATE_LIMIT_UNAUTH_PER_MINUTE
-
-                count = await redis_client.incr(key)
-                if count == 1:
-                    await redis_client.expire(key, 60)
-
-                if count > limit:
-                    return JSONResponse(
-                        status_code=429,
-                        content={"detail": "Rate limit exceeded. Please slow down."},
-                        headers={"Retry-After": "60"},
-                    )
-        except Exception:
-            pass  # Don't fail requests if Redis is down
-
-        return await call_next(request)
+    # Probes skip the whole stack above (added last, so outermost)
+    app.add_middleware(FastPathMiddleware, routes={"/health": health_check})
 
     # ── Exception Handlers ─────────────────────────────────────────
-
-    @app.exception_handler(Exception)
-    async def global_exception_handler(request: Request, exc: Exception):
-        """Catch-all exception handler. Never expose stack traces in production."""
-        import traceback
-        if settings.DEBUG:
-            detail = str(exc)
-            print(traceback.format_exc())
-        else:
-            detail = "An internal server error occurred"
-
-        return JSONResponse(
-            status_code=500,
-            content={
-                "detail": detail,
-                "request_id": getattr(request.state, "request_id", None),
-            },
-        )
+    app.add_exception_handler(Exception, global_exception_handler)
 
     # ── Routes ────────────────────────────────────────────────────
-
-    # Health check (public)
-    @app.get("/health", tags=["Health"], include_in_schema=False)
-    async def health_check():
-        from config.redis_client import redis_client
-        from sqlalchemy import text
-        from config.database import AsyncSessionLocal
-
-        checks = {"status": "ok", "version": settings.APP_VERSION}
-
-        # DB check
-        try:
-            async with AsyncSessionLocal() as session:
-                await session.execute(text("SELECT 1"))
-            checks["database"] = "ok"
-        except Exception:
-            checks["database"] = "error"
-            checks["status"] = "degraded"
-
-        # Redis check
-        try:
-            if redis_client:
-                await redis_client.ping()
-            checks["redis"] = "ok"
-        except Exception:
-            checks["redis"] = "error"
-            checks["status"] = "degraded"
-
-        status_code = 200 if checks["status"] == "ok" else 503
-        return JSONResponse(content=checks, status_code=status_code)
-
-    @app.get("/", include_in_schema=False)
-    async def root():
-        return {
-            "name": settings.APP_NAME,
-            "version": settings.APP_VERSION,
-            "docs": "/docs",
-            "health": "/health",
-        }
+    app.add_api_route("/", root, include_in_schema=False)
 
     # Register all service routers
     app.include_router(auth_router)
@@ -243,6 +264,19 @@ Get a token via the `/auth/google` OAuth flow.
     app.include_router(review_router)
     app.include_router(admin_router)
 
+    # ── OpenAPI ───────────────────────────────────────────────────
+    # Serve the schema as bytes rendered once (FastAPI caches the dict but
+    # re-serializes it on every hit). Inserted first so it shadows the default.
+    openapi_body: bytes | None = None
+
+    async def openapi_json(request: Request) -> Response:
+        nonlocal openapi_body
+        if openapi_body is None:
+            openapi_body = orjson.dumps(app.openapi())
+        return Response(openapi_body, media_type="application/json")
+
+    app.router.routes.insert(0, Route(app.openapi_url, openapi_json, include_in_schema=False))
+
     return app
 
 
@@ -250,15 +284,7 @@ Get a token via the `/auth/google` OAuth flow.
 
 async def seed_initial_data():
     """Seed pooja types on first run (development only)."""
-    from config.database import AsyncSessionLocal
-    from shared.models.models import Pooja, PoojaCategory
-    from sqlalchemy import select, func
-
     async with AsyncSessionLocal() as db:
-        count = await db.scalar(select(func.count(Pooja.id)))
-        if count and count > 0:
-            return  # Already seeded
-
         seed_poojas = [
             {"name_en": "Ganesh Puja", "name_hi": "गणेश पूजा", "slug": "ganesh-puja", "category": PoojaCategory.GRIHA, "avg_duration_hrs": 2.0},
             {"name_en": "Satyanarayan Puja", "name_hi": "सत्यनारायण पूजा", "slug": "satyanarayan-puja", "category": PoojaCategory.GRIHA, "avg_duration_hrs": 3.0},
@@ -272,11 +298,15 @@ async def seed_initial_data():
             {"name_en": "Saraswati Puja", "name_hi": "सरस्वती पूजा", "slug": "saraswati-puja", "category": PoojaCategory.EDUCATION, "avg_duration_hrs": 1.5},
         ]
 
-        for p in seed_poojas:
-            db.add(Pooja(**p))
+        # One multi-row INSERT; ON CONFLICT makes it idempotent and safe when
+        # several workers start at once, so no "already seeded?" query first
+        result = await db.execute(
+            pg_insert(Pooja).values(seed_poojas).on_conflict_do_nothing(index_elements=["slug"])
+        )
 
         await db.commit()
-        print(f"✅ Seeded {len(seed_poojas)} pooja types")
+        if result.rowcount:
+            print(f"✅ Seeded {result.rowcount} pooja types")
 
 
 # ── Entry Point ───────────────────────────────────────────────
@@ -291,6 +321,10 @@ if __name__ == "__main__":
         port=settings.PORT,
         reload=settings.DEBUG,
         workers=1 if settings.DEBUG else settings.WORKERS,
+        # Pin the fast implementations — auto-detect silently falls back to asyncio/h11
+        loop="uvloop",
+        http="httptools",
+        lifespan="on",
         log_level="debug" if settings.DEBUG else "info",
-        access_log=True,
+        access_log=not settings.is_production,
     )
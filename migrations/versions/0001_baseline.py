@@ -0,0 +1,31 @@
+"""Baseline: the schema init_db has always created
+
+Databases so far were built by init_db() (create_all), not migrations. This
+revision does the same for a database that has never seen the app, and is a
+no-op on existing ones — create_all skips tables that already exist. Later
+revisions are written to be safe on both.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    from config.database import Base
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS postgis')
+    op.execute('CREATE EXTENSION IF NOT EXISTS "uuid-ossp"')
+    Base.metadata.create_all(op.get_bind(), checkfirst=True)
+
+
+def downgrade() -> None:
+    # Dropping the whole schema is not something to do from a downgrade
+    pass
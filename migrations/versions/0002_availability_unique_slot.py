@@ -0,0 +1,51 @@
+"""Unique (pandit_id, date, start_time) on pandit_availability
+
+update_my_availability upserts with ON CONFLICT ON CONSTRAINT
+uq_availability_pandit_date_start, which create_all only adds to new tables.
+The old per-slot check-then-insert could race, so duplicates are removed
+first: per slot, a booked row wins, then a blocked one, then the lowest id.
+Nothing references availability rows by id, so dropping the extras is safe.
+
+Revision ID: 0002_availability_unique_slot
+Revises: 0001_baseline
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+revision = "0002_availability_unique_slot"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        DELETE FROM pandit_availability a
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY pandit_id, date, start_time
+                ORDER BY is_booked DESC NULLS LAST, is_blocked DESC NULLS LAST, id
+            ) AS rn
+            FROM pandit_availability
+        ) d
+        WHERE a.id = d.id AND d.rn > 1
+    """)
+    op.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint WHERE conname = 'uq_availability_pandit_date_start'
+            ) THEN
+                ALTER TABLE pandit_availability
+                    ADD CONSTRAINT uq_availability_pandit_date_start
+                    UNIQUE (pandit_id, date, start_time);
+            END IF;
+        END $$
+    """)
+
+
+def downgrade() -> None:
+    op.execute(
+        "ALTER TABLE pandit_availability DROP CONSTRAINT IF EXISTS uq_availability_pandit_date_start"
+    )
@@ -0,0 +1,31 @@
+"""Index notifications on (user_id, created_at, id)
+
+Backs the keyset cursor on GET /notifications: newest-first per user,
+scanned backwards from the cursor.
+
+Revision ID: 0003_notifications_user_created
+Revises: 0002_availability_unique_slot
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+revision = "0003_notifications_user_created"
+down_revision = "0002_availability_unique_slot"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps notifications writable during the build; it can't run
+    # inside a transaction, hence the autocommit block
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notifications_user_created
+            ON notifications (user_id, created_at, id)
+        """)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_notifications_user_created")
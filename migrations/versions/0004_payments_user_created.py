@@ -0,0 +1,31 @@
+"""Covering index for payment history
+
+Keyset pagination of GET /payments/me/history by (user_id, created_at, id),
+with the listed columns included so the page is an index-only scan.
+
+Revision ID: 0004_payments_user_created
+Revises: 0003_notifications_user_created
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+revision = "0004_payments_user_created"
+down_revision = "0003_notifications_user_created"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Concurrent build, as in 0003 — payments takes writes on every checkout
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_payments_user_created
+            ON payments (user_id, created_at, id)
+            INCLUDE (booking_id, amount, status, razorpay_payment_id, captured_at)
+        """)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_payments_user_created")
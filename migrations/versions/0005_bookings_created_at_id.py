@@ -0,0 +1,29 @@
+"""Index bookings on (created_at, id)
+
+Backs the keyset cursor on GET /admin/bookings.
+
+Revision ID: 0005_bookings_created_at_id
+Revises: 0004_payments_user_created
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+revision = "0005_bookings_created_at_id"
+down_revision = "0004_payments_user_created"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Concurrent build, as in 0003
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bookings_created_at_id
+            ON bookings (created_at, id)
+        """)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_bookings_created_at_id")
@@ -0,0 +1,31 @@
+"""Partial index on free availability slots
+
+Booking create/accept look up a pandit's unbooked, unblocked slots by day;
+this keeps that index to just those rows.
+
+Revision ID: 0006_availability_free_slots
+Revises: 0005_bookings_created_at_id
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+revision = "0006_availability_free_slots"
+down_revision = "0005_bookings_created_at_id"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Concurrent build, as in 0003
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_availability_pandit_date_free
+            ON pandit_availability (pandit_id, date)
+            WHERE NOT is_booked AND NOT is_blocked
+        """)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_availability_pandit_date_free")
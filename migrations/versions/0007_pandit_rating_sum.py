@@ -0,0 +1,46 @@
+"""Add pandit_profiles.rating_sum and backfill it
+
+Reviews now adjust the denormalized rating incrementally from a running sum
+(see _apply_rating in services/review/router.py). Existing profiles get the
+column and a backfill over their visible reviews; count and average are
+recomputed from the same rows so the three start out consistent.
+
+Apply together with the deploy: workers still on the old code don't maintain
+rating_sum. The backfill is idempotent, so re-running it reconciles any
+reviews they wrote in between.
+
+Revision ID: 0007_pandit_rating_sum
+Revises: 0006_availability_free_slots
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+revision = "0007_pandit_rating_sum"
+down_revision = "0006_availability_free_slots"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE pandit_profiles ADD COLUMN IF NOT EXISTS rating_sum BIGINT NOT NULL DEFAULT 0"
+    )
+    op.execute("""
+        UPDATE pandit_profiles p
+        SET rating_sum = COALESCE(r.total, 0),
+            rating_count = COALESCE(r.n, 0),
+            rating_avg = COALESCE(ROUND(r.total::numeric / NULLIF(r.n, 0), 2), 0)
+        FROM pandit_profiles p2
+        LEFT JOIN (
+            SELECT pandit_id, SUM(rating) AS total, COUNT(*) AS n
+            FROM reviews
+            WHERE is_visible
+            GROUP BY pandit_id
+        ) r ON r.pandit_id = p2.id
+        WHERE p.id = p2.id
+    """)
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE pandit_profiles DROP COLUMN IF EXISTS rating_sum")
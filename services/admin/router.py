@@ -3,24 +3,26 @@ services/admin/router.py
 Admin-only endpoints: pandit verification, user moderation,
 platform analytics, and immutable audit log.
 
-ALL mutations are logged to AdminAuditLog before returning.
+ALL mutations are logged to AdminAuditLog (written right after the response).
 """
 
 from datetime import datetime, timezone
 from decimal import Decimal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from sqlalchemy import func, select, update
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
+from geoalchemy2 import Geometry
+from sqlalchemy import cast, func, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from config.database import get_db
-from shared.middleware.auth import require_admin
+from config.database import AsyncSessionLocal, get_db
+from config.redis_client import RedisCache, get_redis
+from shared.middleware.auth import invalidate_user_response, require_admin
 from shared.models.models import (
     AdminAuditLog,
     Booking,
     BookingStatus,
-    Notification,
     NotificationType,
     PanditProfile,
     Payment,
@@ -37,31 +39,60 @@ from shared.schemas.schemas import (
     AdminVerifyPanditRequest,
     MessageResponse,
 )
+from shared.utils.notifications import create_notification
+from shared.utils.pagination import decode_cursor, encode_cursor, pages, paginate
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+# Value → enum lookup for the bookings filter (no try/except on the happy path)
+_BOOKING_STATUSES = {s.value: s for s in BookingStatus}
+
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
 
-async def _log(
-    db: AsyncSession,
+def _log(
+    background_tasks: BackgroundTasks,
     admin: User,
     action: str,
     entity_type: str,
-    entity_id: str,
+    entity_id: str | None,
     payload: dict | None = None,
     request: Request | None = None,
-):
-    """Append an immutable record to AdminAuditLog."""
-    log = AdminAuditLog(
-        admin_id=admin.id,
-        action=action,
-        entity_type=entity_type,
-        entity_id=entity_id,
-        payload=payload or {},
-        ip_address=request.client.host if request and request.client else None,
+) -> None:
+    """
+    Queue an immutable AdminAuditLog record.
+    Written in its own session after the response is sent, so the admin
+    mutation's transaction and response don't wait on the audit INSERT.
+    """
+    background_tasks.add_task(
+        _persist_audit,
+        admin.id,
+        action,
+        entity_type,
+        entity_id,
+        payload or {},
+        request.client.host if request and request.client else None,
     )
-    db.add(log)
+
+
+async def _persist_audit(
+    admin_id: UUID,
+    action: str,
+    entity_type: str,
+    entity_id: str | None,
+    payload: dict,
+    ip_address: str | None,
+) -> None:
+    async with AsyncSessionLocal() as db:
+        db.add(AdminAuditLog(
+            admin_id=admin_id,
+            action=action,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            payload=payload,
+            ip_address=ip_address,
+        ))
+        await db.commit()
 
 
 # ── Pandit Verification Queue ──────────────────────────────────────────────────
@@ -83,15 +114,13 @@ async def get_pending_pandits(
         .where(PanditProfile.verification_status == VerificationStatus.PENDING)
         .order_by(PanditProfile.created_at.asc())
     )
-    total = await db.scalar(select(func.count()).select_from(query.subquery()))
-    result = await db.execute(query.offset((page - 1) * page_size).limit(page_size))
-    rows = result.all()
+    rows, total = await paginate(db, query, page, page_size)
 
-    return {
+    return ORJSONResponse({
         "items": [
             {
-                "pandit_id": str(row[0].id),
-                "user_id": str(row[0].user_id),
+                "pandit_id": row[0].id,
+                "user_id": row[0].user_id,
                 "name": row[1].name,
                 "email": row[1].email,
                 "phone": row[1].phone,
@@ -99,24 +128,25 @@ async def get_pending_pandits(
                 "state": row[0].state,
                 "experience_years": row[0].experience_years,
                 "languages": row[0].languages,
-                "poojas_offered": [str(p) for p in (row[0].poojas_offered or [])],
+                "poojas_offered": row[0].poojas_offered or [],
                 "bio": row[0].bio,
                 "documents": row[0].documents,
-                "applied_at": row[0].created_at.isoformat(),
+                "applied_at": row[0].created_at,
             }
             for row in rows
         ],
         "total": total,
         "page": page,
         "page_size": page_size,
-        "total_pages": -(-total // page_size),  # ceiling division
-    }
+        "total_pages": pages(total, page_size),
+    })
 
 
 @router.post("/pandits/{pandit_id}/verify", response_model=MessageResponse)
 async def verify_pandit(
     pandit_id: UUID,
     data: AdminVerifyPanditRequest,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
     request: Request = None,
@@ -128,28 +158,39 @@ async def verify_pandit(
     - Sends in-app + push notification to the pandit
     - TODO: Emit Kafka event → Elasticsearch index
     """
-    result = await db.execute(select(PanditProfile).where(PanditProfile.id == pandit_id))
-    pandit = result.scalar_one_or_none()
-    if not pandit:
+    # Guarded UPDATE … RETURNING: existence check, 409 check and write in one
+    # round-trip, with no window between reading the status and changing it
+    pandit_user_id = await db.scalar(
+        update(PanditProfile)
+        .where(
+            PanditProfile.id == pandit_id,
+            PanditProfile.verification_status != VerificationStatus.VERIFIED,
+        )
+        .values(
+            verification_status=VerificationStatus.VERIFIED,
+            verification_notes=data.notes,
+            verified_at=datetime.now(timezone.utc),
+            verified_by_id=current_user.id,
+        )
+        .returning(PanditProfile.user_id)
+        .execution_options(synchronize_session=False)
+    )
+    if pandit_user_id is None:
+        if await db.scalar(select(PanditProfile.id).where(PanditProfile.id == pandit_id)):
+            raise HTTPException(status_code=409, detail="Pandit is already verified")
         raise HTTPException(status_code=404, detail="Pandit not found")
-    if pandit.verification_status == VerificationStatus.VERIFIED:
-        raise HTTPException(status_code=409, detail="Pandit is already verified")
-
-    pandit.verification_status = VerificationStatus.VERIFIED
-    pandit.verification_notes = data.notes
-    pandit.verified_at = datetime.now(timezone.utc)
-    pandit.verified_by_id = current_user.id
 
-    # In-app notification
-    db.add(Notification(
-        user_id=pandit.user_id,
-        type=NotificationType.ACCOUNT_VERIFIED,
-        title="Profile Verified! 🎉",
-        body="Congratulations! Your pandit profile has been verified. You can now accept bookings.",
-    ))
+    # In-app notification. No dedup: the guarded UPDATE already makes this
+    # once-only, and a reject shares the type, so it would swallow this.
+    await create_notification(
+        db, pandit_user_id, NotificationType.ACCOUNT_VERIFIED,
+        "Profile Verified! 🎉",
+        "Congratulations! Your pandit profile has been verified. You can now accept bookings.",
+        dedup=False,
+    )
 
-    await _log(db, current_user, "VERIFY_PANDIT", "PanditProfile", str(pandit_id),
-               {"notes": data.notes}, request)
+    _log(background_tasks, current_user, "VERIFY_PANDIT", "PanditProfile", str(pandit_id),
+         {"notes": data.notes}, request)
 
     # TODO: emit PanditVerified Kafka event
     # kafka.produce("pandit.verified", {"pandit_id": str(pandit_id)})
@@ -162,28 +203,35 @@ async def verify_pandit(
 async def reject_pandit(
     pandit_id: UUID,
     data: AdminRejectPanditRequest,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
     request: Request = None,
 ):
     """Reject a pandit application with a reason. Pandit can re-apply after fixing issues."""
-    result = await db.execute(select(PanditProfile).where(PanditProfile.id == pandit_id))
-    pandit = result.scalar_one_or_none()
-    if not pandit:
+    pandit_user_id = await db.scalar(
+        update(PanditProfile)
+        .where(PanditProfile.id == pandit_id)
+        .values(
+            verification_status=VerificationStatus.REJECTED,
+            verification_notes=data.reason,
+        )
+        .returning(PanditProfile.user_id)
+        .execution_options(synchronize_session=False)
+    )
+    if pandit_user_id is None:
         raise HTTPException(status_code=404, detail="Pandit not found")
 
-    pandit.verification_status = VerificationStatus.REJECTED
-    pandit.verification_notes = data.reason
-
-    db.add(Notification(
-        user_id=pandit.user_id,
-        type=NotificationType.ACCOUNT_VERIFIED,  # reuse; add ACCOUNT_REJECTED type in prod
-        title="Application Update",
-        body=f"Your pandit profile application was not approved. Reason: {data.reason}",
-    ))
+    await create_notification(
+        db, pandit_user_id,
+        NotificationType.ACCOUNT_VERIFIED,  # reuse; add ACCOUNT_REJECTED type in prod
+        "Application Update",
+        f"Your pandit profile application was not approved. Reason: {data.reason}",
+        dedup=False,  # each rejection carries its own reason
+    )
 
-    await _log(db, current_user, "REJECT_PANDIT", "PanditProfile", str(pandit_id),
-               {"reason": data.reason}, request)
+    _log(background_tasks, current_user, "REJECT_PANDIT", "PanditProfile", str(pandit_id),
+         {"reason": data.reason}, request)
     await db.commit()
     return MessageResponse(message="Pandit application rejected")
 
@@ -192,22 +240,28 @@ async def reject_pandit(
 async def suspend_pandit(
     pandit_id: UUID,
     data: AdminSuspendRequest,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
     request: Request = None,
 ):
     """Suspend a verified pandit. They cannot accept new bookings while suspended."""
-    result = await db.execute(select(PanditProfile).where(PanditProfile.id == pandit_id))
-    pandit = result.scalar_one_or_none()
-    if not pandit:
+    suspended_id = await db.scalar(
+        update(PanditProfile)
+        .where(PanditProfile.id == pandit_id)
+        .values(
+            verification_status=VerificationStatus.SUSPENDED,
+            is_available=False,
+            verification_notes=f"SUSPENDED: {data.reason}",
+        )
+        .returning(PanditProfile.id)
+        .execution_options(synchronize_session=False)
+    )
+    if suspended_id is None:
         raise HTTPException(status_code=404, detail="Pandit not found")
 
-    pandit.verification_status = VerificationStatus.SUSPENDED
-    pandit.is_available = False
-    pandit.verification_notes = f"SUSPENDED: {data.reason}"
-
-    await _log(db, current_user, "SUSPEND_PANDIT", "PanditProfile", str(pandit_id),
-               {"reason": data.reason, "duration_days": data.duration_days}, request)
+    _log(background_tasks, current_user, "SUSPEND_PANDIT", "PanditProfile", str(pandit_id),
+         {"reason": data.reason, "duration_days": data.duration_days}, request)
 
     # TODO: emit PanditSuspended Kafka event → remove from Elasticsearch
     await db.commit()
@@ -217,35 +271,78 @@ async def suspend_pandit(
 @router.post("/pandits/{pandit_id}/reinstate", response_model=MessageResponse)
 async def reinstate_pandit(
     pandit_id: UUID,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
     request: Request = None,
 ):
     """Reinstate a previously suspended pandit."""
-    result = await db.execute(select(PanditProfile).where(PanditProfile.id == pandit_id))
-    pandit = result.scalar_one_or_none()
-    if not pandit:
+    reinstated_id = await db.scalar(
+        update(PanditProfile)
+        .where(
+            PanditProfile.id == pandit_id,
+            PanditProfile.verification_status == VerificationStatus.SUSPENDED,
+        )
+        .values(
+            verification_status=VerificationStatus.VERIFIED,
+            is_available=True,
+            verification_notes=None,
+        )
+        .returning(PanditProfile.id)
+        .execution_options(synchronize_session=False)
+    )
+    if reinstated_id is None:
+        if await db.scalar(select(PanditProfile.id).where(PanditProfile.id == pandit_id)):
+            raise HTTPException(status_code=400, detail="Pandit is not suspended")
         raise HTTPException(status_code=404, detail="Pandit not found")
-    if pandit.verification_status != VerificationStatus.SUSPENDED:
-        raise HTTPException(status_code=400, detail="Pandit is not suspended")
-
-    pandit.verification_status = VerificationStatus.VERIFIED
-    pandit.is_available = True
-    pandit.verification_notes = None
 
-    await _log(db, current_user, "REINSTATE_PANDIT", "PanditProfile", str(pandit_id), {}, request)
+    _log(background_tasks, current_user, "REINSTATE_PANDIT", "PanditProfile", str(pandit_id), {}, request)
     await db.commit()
     return MessageResponse(message="Pandit reinstated")
 
 
+@router.post("/pandits/geo-sync", response_model=MessageResponse)
+async def sync_pandit_geo(
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+    redis=Depends(get_redis),
+    request: Request = None,
+):
+    """
+    Rebuild the Redis GEO set from PostGIS (e.g. after a Redis flush or drift).
+    Verified pandit locations are loaded with batched GEOADDs into a scratch
+    key that then replaces pandits_geo, so suspended or unverified pandits
+    left in the old set drop out of nearby searches. A live location update
+    landing mid-rebuild is overwritten and reappears on the pandit's next ping.
+    """
+    point = cast(PanditProfile.location, Geometry)
+    result = await db.execute(
+        select(PanditProfile.id, func.ST_X(point), func.ST_Y(point)).where(
+            PanditProfile.verification_status == VerificationStatus.VERIFIED,
+            PanditProfile.location != None,
+        )
+    )
+    items = [(str(pandit_id), lng, lat) for pandit_id, lng, lat in result.all()]
+
+    await RedisCache(redis).replace_pandit_locations(items)
+
+    _log(background_tasks, current_user, "SYNC_PANDIT_GEO", "PanditProfile", None,
+         {"count": len(items)}, request)
+    await db.commit()
+    return MessageResponse(message=f"{len(items)} pandit locations synced")
+
+
 # ── User Moderation ────────────────────────────────────────────────────────────
 
 @router.post("/users/{user_id}/suspend", response_model=MessageResponse)
 async def suspend_user(
     user_id: UUID,
     data: AdminSuspendRequest,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
+    redis=Depends(get_redis),
     request: Request = None,
 ):
     """Deactivate a user account. Admins cannot be suspended."""
@@ -259,15 +356,17 @@ async def suspend_user(
         raise HTTPException(status_code=409, detail="User is already suspended")
 
     user.is_active = False
-    await _log(db, current_user, "SUSPEND_USER", "User", str(user_id),
-               {"reason": data.reason}, request)
+    _log(background_tasks, current_user, "SUSPEND_USER", "User", str(user_id),
+         {"reason": data.reason}, request)
     await db.commit()
+    await invalidate_user_response(redis, user_id)
     return MessageResponse(message="User suspended")
 
 
 @router.post("/users/{user_id}/reactivate", response_model=MessageResponse)
 async def reactivate_user(
     user_id: UUID,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
     request: Request = None,
@@ -279,7 +378,7 @@ async def reactivate_user(
         raise HTTPException(status_code=404, detail="User not found")
 
     user.is_active = True
-    await _log(db, current_user, "REACTIVATE_USER", "User", str(user_id), {}, request)
+    _log(background_tasks, current_user, "REACTIVATE_USER", "User", str(user_id), {}, request)
     await db.commit()
     return MessageResponse(message="User reactivated")
 
@@ -293,50 +392,64 @@ async def list_all_bookings(
     pandit_id: UUID = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: str = Query(None, description="next_cursor from the previous page (keyset pagination)"),
     current_user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
 ):
-    """Admin: view all bookings with status, user, or pandit filter."""
-    query = select(Booking).order_by(Booking.created_at.desc())
+    """
+    Admin: view all bookings with status, user, or pandit filter.
+    Pass `cursor` to page by keyset — cost is independent of depth, but `total`
+    is skipped. Without it, the first/numbered pages include the total.
+    """
+    query = select(Booking).order_by(Booking.created_at.desc(), Booking.id.desc())
 
     if status_filter:
-        try:
-            query = query.where(Booking.status == BookingStatus(status_filter))
-        except ValueError:
-            valid = [s.value for s in BookingStatus]
-            raise HTTPException(status_code=400, detail=f"Invalid status. Valid: {valid}")
+        status_enum = _BOOKING_STATUSES.get(status_filter)
+        if status_enum is None:
+            raise HTTPException(status_code=400, detail=f"Invalid status. Valid: {list(_BOOKING_STATUSES)}")
+        query = query.where(Booking.status == status_enum)
     if user_id:
         query = query.where(Booking.user_id == user_id)
     if pandit_id:
         query = query.where(Booking.pandit_id == pandit_id)
 
-    total = await db.scalar(select(func.count()).select_from(query.subquery()))
-    result = await db.execute(query.offset((page - 1) * page_size).limit(page_size))
-    bookings = result.scalars().all()
-
-    return {
+    if cursor:
+        cursor_ts, cursor_id = decode_cursor(cursor)
+        query = query.where(tuple_(Booking.created_at, Booking.id) < (cursor_ts, cursor_id))
+        result = await db.execute(query.limit(page_size))
+        bookings = result.scalars().all()
+        total = None
+    else:
+        rows, total = await paginate(db, query, page, page_size)
+        bookings = [row[0] for row in rows]
+
+    return ORJSONResponse({
         "items": [
             {
-                "id": str(b.id),
+                "id": b.id,
                 "booking_number": b.booking_number,
-                "user_id": str(b.user_id),
-                "pandit_id": str(b.pandit_id),
-                "pooja_id": str(b.pooja_id),
+                "user_id": b.user_id,
+                "pandit_id": b.pandit_id,
+                "pooja_id": b.pooja_id,
                 "status": b.status.value,
-                "scheduled_at": b.scheduled_at.isoformat(),
+                "scheduled_at": b.scheduled_at,
                 "total_amount": float(b.total_amount),
                 "platform_fee": float(b.platform_fee),
                 "pandit_payout": float(b.pandit_payout),
                 "cancellation_reason": b.cancellation_reason,
-                "created_at": b.created_at.isoformat(),
+                "created_at": b.created_at,
             }
             for b in bookings
         ],
         "total": total,
         "page": page,
         "page_size": page_size,
-        "total_pages": -(-total // page_size),
-    }
+        "total_pages": pages(total, page_size) if total is not None else None,
+        "next_cursor": (
+            encode_cursor(bookings[-1].created_at, bookings[-1].id)
+            if len(bookings) == page_size else None
+        ),
+    })
 
 
 # ── Analytics ─────────────────────────────────────────────────────────────────
@@ -349,45 +462,48 @@ async def get_analytics(
     """Platform-wide metrics dashboard. All queries run against the primary DB."""
     today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
 
-    total_users = await db.scalar(
-        select(func.count(User.id)).where(User.role == UserRole.USER)
-    )
-    total_pandits = await db.scalar(select(func.count(PanditProfile.id)))
-    verified_pandits = await db.scalar(
+    # All nine aggregates as scalar subqueries of one SELECT — one round-trip
+    row = (await db.execute(select(
+        select(func.count(User.id))
+        .where(User.role == UserRole.USER)
+        .scalar_subquery().label("total_users"),
+        select(func.count(PanditProfile.id))
+        .scalar_subquery().label("total_pandits"),
         select(func.count(PanditProfile.id))
         .where(PanditProfile.verification_status == VerificationStatus.VERIFIED)
-    )
-    pending_verification = await db.scalar(
+        .scalar_subquery().label("verified_pandits"),
         select(func.count(PanditProfile.id))
         .where(PanditProfile.verification_status == VerificationStatus.PENDING)
-    )
-    total_bookings = await db.scalar(select(func.count(Booking.id)))
-    bookings_today = await db.scalar(
-        select(func.count(Booking.id)).where(Booking.created_at >= today_start)
-    )
-    total_revenue = await db.scalar(
-        select(func.sum(Payment.amount)).where(Payment.status == PaymentStatus.CAPTURED)
-    )
-    revenue_today = await db.scalar(
-        select(func.sum(Payment.amount)).where(
+        .scalar_subquery().label("pending_verification"),
+        select(func.count(Booking.id))
+        .scalar_subquery().label("total_bookings"),
+        select(func.count(Booking.id))
+        .where(Booking.created_at >= today_start)
+        .scalar_subquery().label("bookings_today"),
+        select(func.sum(Payment.amount))
+        .where(Payment.status == PaymentStatus.CAPTURED)
+        .scalar_subquery().label("total_revenue"),
+        select(func.sum(Payment.amount))
+        .where(
             Payment.status == PaymentStatus.CAPTURED,
             Payment.captured_at >= today_start,
         )
-    )
-    avg_rating = await db.scalar(
-        select(func.avg(Review.rating)).where(Review.is_visible == True)
-    )
+        .scalar_subquery().label("revenue_today"),
+        select(func.avg(Review.rating))
+        .where(Review.is_visible == True)
+        .scalar_subquery().label("avg_rating"),
+    ))).one()
 
     return AdminAnalyticsResponse(
-        total_users=total_users or 0,
-        total_pandits=total_pandits or 0,
-        verified_pandits=verified_pandits or 0,
-        pending_verification=pending_verification or 0,
-        total_bookings=total_bookings or 0,
-        bookings_today=bookings_today or 0,
-        total_revenue=Decimal(str(total_revenue or 0)),
-        revenue_today=Decimal(str(revenue_today or 0)),
-        avg_rating=float(avg_rating or 0),
+        total_users=row.total_users or 0,
+        total_pandits=row.total_pandits or 0,
+        verified_pandits=row.verified_pandits or 0,
+        pending_verification=row.pending_verification or 0,
+        total_bookings=row.total_bookings or 0,
+        bookings_today=row.bookings_today or 0,
+        total_revenue=Decimal(str(row.total_revenue or 0)),
+        revenue_today=Decimal(str(row.revenue_today or 0)),
+        avg_rating=float(row.avg_rating or 0),
     )
 
 
@@ -413,16 +529,13 @@ async def get_audit_logs(
     if entity_type:
         query = query.where(AdminAuditLog.entity_type == entity_type)
 
-    total = await db.scalar(select(func.count()).select_from(
-        select(AdminAuditLog).subquery()
-    ))
-    result = await db.execute(query.offset((page - 1) * page_size).limit(page_size))
-    rows = result.all()
+    # Total honours the action/entity_type filters (previously counted every row)
+    rows, total = await paginate(db, query, page, page_size)
 
-    return {
+    return ORJSONResponse({
         "items": [
             {
-                "id": str(row[0].id),
+                "id": row[0].id,
                 "admin_name": row[1].name,
                 "admin_email": row[1].email,
                 "action": row[0].action,
@@ -430,11 +543,12 @@ async def get_audit_logs(
                 "entity_id": row[0].entity_id,
                 "payload": row[0].payload,
                 "ip_address": row[0].ip_address,
-                "created_at": row[0].created_at.isoformat(),
+                "created_at": row[0].created_at,
             }
             for row in rows
         ],
         "total": total,
         "page": page,
         "page_size": page_size,
-    }
+        "total_pages": pages(total, page_size),
+    })
@@ -4,32 +4,55 @@ OAuth2 (Google) authentication endpoints.
 Implements: Login → Callback → JWT issue → Refresh → Logout
 """
 
+import asyncio
 from datetime import datetime, timedelta, timezone
 from typing import Optional
+from uuid import uuid4
 
 import httpx
 from authlib.integrations.starlette_client import OAuth, OAuthError
-from fastapi import APIRouter, Cookie, Depends, HTTPException, Request, Response, status
-from fastapi.responses import RedirectResponse
-from sqlalchemy import select
+from fastapi import APIRouter, Body, Cookie, Depends, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse, RedirectResponse
+from sqlalchemy import and_, bindparam, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config.database import get_db
 from config.redis_client import get_redis
 from config.settings import settings
-from shared.middleware.auth import get_current_user
+from shared.middleware.auth import get_current_user, get_current_user_response
 from shared.models.models import OAuthProvider, RefreshToken, User, UserRole
-from shared.schemas.schemas import AuthCallbackResponse, MessageResponse, TokenResponse, UserResponse
+from shared.schemas.schemas import (
+    AuthCallbackResponse,
+    MessageResponse,
+    RefreshTokenRequest,
+    TokenResponse,
+    UserResponse,
+)
 from shared.utils.security import (
     create_access_token,
     create_refresh_token,
     get_token_remaining_ttl,
-    hash_token,
+    refresh_token_hashes,
     verify_access_token,
 )
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+# Token lifetimes, derived once from settings
+_REFRESH_TTL = timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS)
+_REFRESH_MAX_AGE = settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS * 86400
+_ACCESS_EXPIRES_IN = settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+# Refresh-token lookup is hit on every token refresh — build it once at import.
+_REFRESH_TOKEN_BY_HASH_STMT = (
+    select(RefreshToken, User)
+    .join(User, User.id == RefreshToken.user_id)
+    .where(
+        RefreshToken.token_hash.in_(bindparam("token_hashes", expanding=True)),
+        RefreshToken.is_revoked == False,
+    )
+)
+
 # ── OAuth Setup ───────────────────────────────────────────────
 oauth = OAuth()
 oauth.register(
@@ -53,19 +76,24 @@ async def _get_or_create_user(
     avatar_url: Optional[str],
 ) -> User:
     """Get existing user by OAuth ID or create a new one."""
-    # Try find by oauth provider + id
+    # One round-trip for both candidates: the OAuth identity match and the
+    # same-email account (different provider). At most two rows — both are unique.
     result = await db.execute(
         select(User).where(
-            User.oauth_provider == oauth_provider,
-            User.oauth_id == oauth_id,
-        )
+            or_(
+                and_(User.oauth_provider == oauth_provider, User.oauth_id == oauth_id),
+                User.email == email,
+            )
+        ).limit(2)
+    )
+    candidates = result.scalars().all()
+    user = next(
+        (u for u in candidates if u.oauth_provider == oauth_provider and u.oauth_id == oauth_id),
+        None,
     )
-    user = result.scalar_one_or_none()
 
     if not user:
-        # Try find by email (different provider, same email)
-        result = await db.execute(select(User).where(User.email == email))
-        existing = result.scalar_one_or_none()
+        existing = next(iter(candidates), None)
         if existing:
             # Link this OAuth provider to existing account
             existing.oauth_provider = oauth_provider
@@ -73,8 +101,10 @@ async def _get_or_create_user(
             existing.avatar_url = avatar_url or existing.avatar_url
             return existing
 
-        # Brand new user
+        # Brand new user — id assigned here so no flush is needed before
+        # tokens are issued; the INSERT rides along with the caller's commit
         user = User(
+            id=uuid4(),
             oauth_provider=oauth_provider,
             oauth_id=oauth_id,
             email=email,
@@ -83,11 +113,23 @@ async def _get_or_create_user(
             role=UserRole.USER,
         )
         db.add(user)
-        await db.flush()
 
     return user
 
 
+async def _deny_list_access_token(redis, token: str) -> None:
+    """Deny-list an access token's JTI until it expires. Best-effort."""
+    try:
+        payload = verify_access_token(token)
+        jti = payload.get("jti")
+        if jti:
+            ttl = get_token_remaining_ttl(payload)
+            if ttl > 0:
+                await redis.setex(f"jwt_revoked:{jti}", ttl, "1")
+    except Exception:
+        pass
+
+
 async def _issue_tokens(
     user: User,
     db: AsyncSession,
@@ -104,9 +146,7 @@ async def _issue_tokens(
 
     # Refresh token
     raw_refresh, hashed_refresh = create_refresh_token()
-    expires_at = datetime.now(timezone.utc) + timedelta(
-        days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS
-    )
+    expires_at = datetime.now(timezone.utc) + _REFRESH_TTL
 
     db_token = RefreshToken(
         user_id=user.id,
@@ -124,7 +164,7 @@ async def _issue_tokens(
         httponly=True,
         secure=settings.is_production,
         samesite="lax",
-        max_age=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS * 86400,
+        max_age=_REFRESH_MAX_AGE,
         path="/auth/refresh",
     )
 
@@ -187,7 +227,7 @@ async def google_callback(
     return AuthCallbackResponse(
         access_token=access_token,
         refresh_token=raw_refresh,
-        expires_in=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        expires_in=_ACCESS_EXPIRES_IN,
         user=UserResponse.model_validate(user),
     )
 
@@ -202,17 +242,15 @@ async def refresh_token(
     response: Response,
     # Accept from cookie (web) or request body (mobile)
     refresh_token_cookie: Optional[str] = Cookie(None, alias="refresh_token"),
+    body: Optional[RefreshTokenRequest] = Body(None),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Issue a new access token using a valid refresh token.
     Implements refresh token rotation — old token is revoked.
     """
-    # Get token from cookie or Authorization header
-    raw_token = refresh_token_cookie
-    if not raw_token:
-        body = await request.json()
-        raw_token = body.get("refresh_token")
+    # Get token from cookie or request body
+    raw_token = refresh_token_cookie or (body and body.refresh_token)
 
     if not raw_token:
         raise HTTPException(
@@ -220,15 +258,11 @@ async def refresh_token(
             detail="Refresh token required",
         )
 
-    # Find token in DB
-    token_hash = hash_token(raw_token)
+    # Find token and its user in one round-trip
     result = await db.execute(
-        select(RefreshToken).where(
-            RefreshToken.token_hash == token_hash,
-            RefreshToken.is_revoked == False,
-        )
+        _REFRESH_TOKEN_BY_HASH_STMT, {"token_hashes": refresh_token_hashes(raw_token)}
     )
-    db_token = result.scalar_one_or_none()
+    db_token, user = result.first() or (None, None)
 
     if not db_token:
         raise HTTPException(
@@ -242,10 +276,7 @@ async def refresh_token(
             detail="Refresh token expired",
         )
 
-    # Load user
-    result = await db.execute(select(User).where(User.id == db_token.user_id))
-    user = result.scalar_one_or_none()
-    if not user or not user.is_active:
+    if not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
     # Rotate: revoke old token, issue new ones
@@ -256,7 +287,7 @@ async def refresh_token(
 
     return TokenResponse(
         access_token=access_token,
-        expires_in=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        expires_in=_ACCESS_EXPIRES_IN,
     )
 
 
@@ -273,28 +304,24 @@ async def logout(
     Revoke refresh token + add JWT to deny-list in Redis.
     Clears httpOnly cookie.
     """
+    pending = []
+
     # Add current access token JTI to Redis deny-list
     auth_header = request.headers.get("Authorization", "")
     if auth_header.startswith("Bearer "):
-        try:
-            payload = verify_access_token(auth_header[7:])
-            jti = payload.get("jti")
-            if jti:
-                ttl = get_token_remaining_ttl(payload)
-                if ttl > 0:
-                    await redis.setex(f"jwt_revoked:{jti}", ttl, "1")
-        except Exception:
-            pass
+        pending.append(_deny_list_access_token(redis, auth_header[7:]))
 
     # Revoke refresh token
     if refresh_token_cookie:
-        token_hash = hash_token(refresh_token_cookie)
-        result = await db.execute(
-            select(RefreshToken).where(RefreshToken.token_hash == token_hash)
-        )
-        db_token = result.scalar_one_or_none()
-        if db_token:
-            db_token.is_revoked = True
+        pending.append(db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.token_hash.in_(refresh_token_hashes(refresh_token_cookie)))
+            .values(is_revoked=True)
+            .execution_options(synchronize_session=False)
+        ))
+
+    # Redis and DB revocations are independent — run them concurrently
+    await asyncio.gather(*pending)
 
     # Clear cookie
     response.delete_cookie(key="refresh_token", path="/auth/refresh")
@@ -304,6 +331,6 @@ async def logout(
 
 
 @router.get("/me", response_model=UserResponse, summary="Get current user")
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(user_payload: dict = Depends(get_current_user_response)):
     """Returns the authenticated user's profile."""
-    return UserResponse.model_validate(current_user)
+    return ORJSONResponse(user_payload)
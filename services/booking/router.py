@@ -5,16 +5,20 @@ States: DRAFT → SLOT_LOCKED → PAYMENT_PENDING → AWAITING_PANDIT
         → CONFIRMED | DECLINED → COMPLETED | CANCELLED
 """
 
-import random
-import string
-from datetime import datetime, timedelta, timezone
-from uuid import UUID
+import asyncio
+import base64
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from operator import attrgetter
+from uuid import UUID, uuid4
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
-from sqlalchemy import func, select
+from sqlalchemy import and_, bindparam, exists, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from config.database import get_db
+from config.database import AsyncSessionLocal, get_db
 from config.redis_client import RedisCache, get_redis
 from config.settings import settings
 from shared.middleware.auth import get_current_user, require_pandit
@@ -22,6 +26,7 @@ from shared.models.models import (
     Booking,
     BookingAuditLog,
     BookingStatus,
+    NotificationType,
     PanditAvailability,
     PanditProfile,
     Pooja,
@@ -36,29 +41,126 @@ from shared.schemas.schemas import (
     BookingResponse,
     MessageResponse,
 )
+from shared.utils.notifications import create_notification
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
+# Derived from settings once at import
+_COMMISSION_BPS = settings.commission_bps
+_ACCEPT_DEADLINE = timedelta(hours=settings.BOOKING_ACCEPT_DEADLINE_HOURS)
+
+_CANCELLABLE_STATUSES = (
+    BookingStatus.SLOT_LOCKED,
+    BookingStatus.PAYMENT_PENDING,
+    BookingStatus.AWAITING_PANDIT,
+    BookingStatus.CONFIRMED,
+)
+
+# ── Hot Statements ────────────────────────────────────────────
+# Built once at import; each call only binds parameters, skipping construction
+# and the compiled-cache key walk.
+_BOOKING_BY_ID_STMT = select(Booking).where(Booking.id == bindparam("bid"))
+_PANDIT_ID_BY_USER_ID_STMT = select(PanditProfile.id).where(
+    PanditProfile.user_id == bindparam("uid")
+)
+# Just the Booking columns BookingResponse exposes, for read-only list queries
+_BOOKING_RESPONSE_COLUMNS = tuple(
+    col for col in Booking.__table__.columns if col.name in BookingResponse.model_fields
+)
+_BOOKING_RESPONSE_FIELDS = tuple(col.name for col in _BOOKING_RESPONSE_COLUMNS)
+_booking_response_values = attrgetter(*_BOOKING_RESPONSE_FIELDS)
+
 
 # ── Helpers ───────────────────────────────────────────────────
 
 def _generate_booking_number() -> str:
-    """Generate a human-readable booking number like PB-2024-X7K9M."""
+    """
+    Generate a human-readable booking number like PB-2024-X7K9MQ2ZAB.
+    48 random bits in base32 (A-Z2-7, 10 chars) — wide enough that unique-constraint
+    collisions are practically impossible, and one urandom call instead of a choices loop.
+    """
     year = datetime.now().year
-    suffix = "".join(random.choices(string.ascii_uppercase + string.digits, k=5))
+    suffix = base64.b32encode(os.urandom(6)).decode().rstrip("=")
     return f"PB-{year}-{suffix}"
 
 
+def _day_bounds(day: date) -> tuple[datetime, datetime]:
+    """[start, end) of a UTC day — a range predicate the availability date index can use."""
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
 async def _get_booking_or_404(booking_id: UUID, db: AsyncSession) -> Booking:
-    result = await db.execute(select(Booking).where(Booking.id == booking_id))
+    result = await db.execute(_BOOKING_BY_ID_STMT, {"bid": booking_id})
     booking = result.scalar_one_or_none()
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     return booking
 
 
-async def _log_status_change(
+async def _get_pandit_booking(
+    booking_id: UUID,
+    current_user: User,
     db: AsyncSession,
+    forbidden_detail: str = "Not authorized",
+) -> tuple[Booking, PanditProfile]:
+    """
+    Load a booking together with the current user's pandit profile, joined on
+    ownership — one round-trip. Only on a miss is a second lookup made, to tell
+    a missing booking (404) from someone else's (403).
+    """
+    result = await db.execute(
+        select(Booking, PanditProfile)
+        .join(PanditProfile, PanditProfile.id == Booking.pandit_id)
+        .where(Booking.id == booking_id, PanditProfile.user_id == current_user.id)
+    )
+    row = result.first()
+    if row:
+        return row
+    if not await db.scalar(select(exists().where(Booking.id == booking_id))):
+        raise HTTPException(status_code=404, detail="Booking not found")
+    raise HTTPException(status_code=403, detail=forbidden_detail)
+
+
+async def _transition_pandit_booking(
+    booking_id: UUID,
+    current_user: User,
+    db: AsyncSession,
+    from_status: BookingStatus,
+    to_status: BookingStatus,
+    values: dict,
+    *criteria,
+    forbidden_detail: str = "Not authorized",
+) -> tuple[Booking, bool]:
+    """
+    Move a booking owned by the current pandit out of from_status with one
+    UPDATE … RETURNING. The status guard in the WHERE makes the transition
+    race-free (two concurrent accepts can't both win). Returns (booking, True)
+    on success; on a miss the booking is re-read for the 404/403 and returned
+    unchanged as (booking, False) so the caller can pick the 400 message.
+    """
+    booking = await db.scalar(
+        update(Booking)
+        .where(
+            Booking.id == booking_id,
+            Booking.status == from_status,
+            Booking.pandit_id == select(PanditProfile.id)
+            .where(PanditProfile.user_id == current_user.id)
+            .scalar_subquery(),
+            *criteria,
+        )
+        .values(status=to_status, **values)
+        .returning(Booking)
+        .execution_options(synchronize_session=False)
+    )
+    if booking:
+        return booking, True
+    booking, _ = await _get_pandit_booking(booking_id, current_user, db, forbidden_detail)
+    return booking, False
+
+
+def _log_status_change(
+    background_tasks: BackgroundTasks,
     booking: Booking,
     from_status: str,
     to_status: str,
@@ -66,24 +168,40 @@ async def _log_status_change(
     reason: str = None,
     metadata: dict = None,
 ):
-    """Append an immutable audit log entry for every status change."""
-    log = BookingAuditLog(
-        booking_id=booking.id,
-        from_status=from_status,
-        to_status=to_status,
-        changed_by_id=changed_by.id,
-        reason=reason,
-        metadata=metadata,
+    """
+    Queue an immutable audit log entry for every status change.
+    Written in its own session after the response, outside the booking transaction.
+    """
+    background_tasks.add_task(
+        _persist_status_change,
+        booking.id, from_status, to_status, changed_by.id, reason, metadata,
     )
-    db.add(log)
+
+
+async def _persist_status_change(
+    booking_id: UUID,
+    from_status: str,
+    to_status: str,
+    changed_by_id: UUID,
+    reason: str = None,
+    metadata: dict = None,
+):
+    async with AsyncSessionLocal() as db:
+        db.add(BookingAuditLog(
+            booking_id=booking_id,
+            from_status=from_status,
+            to_status=to_status,
+            changed_by_id=changed_by_id,
+            reason=reason,
+            metadata_=metadata,
+        ))
+        await db.commit()
 
 
 def _enrich_booking(booking: Booking) -> BookingResponse:
-    return BookingResponse(
-        **{
-            col.name: getattr(booking, col.name)
-            for col in Booking.__table__.columns
-        }
+    """Trusted ORM row → response, without re-running field validation."""
+    return BookingResponse.model_construct(
+        **dict(zip(_BOOKING_RESPONSE_FIELDS, _booking_response_values(booking)))
     )
 
 
@@ -93,22 +211,17 @@ async def _send_notification_async(
     title: str,
     body: str,
     booking_id: str = None,
-    db: AsyncSession = None,
 ):
     """
-    Fire-and-forget notification. In production, publish to Kafka/BullMQ.
-    For now, we store in DB directly.
+    Fire-and-forget notification, run via BackgroundTasks with its own session
+    (the request's session is closed by then). In production, publish to Kafka/BullMQ.
     """
-    from shared.models.models import Notification, NotificationType
     try:
-        notif = Notification(
-            user_id=user_id,
-            booking_id=booking_id,
-            type=NotificationType[notification_type],
-            title=title,
-            body=body,
-        )
-        db.add(notif)
+        async with AsyncSessionLocal() as db:
+            await create_notification(
+                db, user_id, NotificationType[notification_type], title, body, booking_id,
+            )
+            await db.commit()
         # In production: also push to FCM, SMS etc. via notification service
     except Exception:
         pass  # Don't fail booking flow on notification errors
@@ -135,33 +248,42 @@ async def create_booking(
     if current_user.role == UserRole.PANDIT:
         raise HTTPException(status_code=403, detail="Pandits cannot book other pandits")
 
+    # Steps 1–3 in one round-trip: pandit, pooja and a free slot on that day.
+    # Pooja and the slot are outer-joined, so a missing one comes back as None.
+    day_start, day_end = _day_bounds(data.scheduled_at.date())
+    result = await db.execute(
+        select(PanditProfile, Pooja, PanditAvailability)
+        .select_from(PanditProfile)
+        .outerjoin(Pooja, Pooja.id == data.pooja_id)
+        .outerjoin(
+            PanditAvailability,
+            and_(
+                PanditAvailability.pandit_id == PanditProfile.id,
+                PanditAvailability.date >= day_start,
+                PanditAvailability.date < day_end,
+                PanditAvailability.is_booked == False,
+                PanditAvailability.is_blocked == False,
+            ),
+        )
+        .where(PanditProfile.id == data.pandit_id)
+        .limit(1)
+    )
+    row = result.first()
+
     # Step 1: Validate pandit
-    result = await db.execute(select(PanditProfile).where(PanditProfile.id == data.pandit_id))
-    pandit = result.scalar_one_or_none()
-    if not pandit:
+    if not row:
         raise HTTPException(status_code=404, detail="Pandit not found")
+    pandit, pooja, available_slot = row
     if pandit.verification_status != VerificationStatus.VERIFIED:
         raise HTTPException(status_code=400, detail="Pandit is not verified")
     if not pandit.is_available:
         raise HTTPException(status_code=400, detail="Pandit is currently not accepting bookings")
 
     # Step 2: Validate pooja
-    result = await db.execute(select(Pooja).where(Pooja.id == data.pooja_id))
-    pooja = result.scalar_one_or_none()
     if not pooja:
         raise HTTPException(status_code=404, detail="Pooja type not found")
 
     # Step 3: Check availability slot
-    scheduled_date = data.scheduled_at.date()
-    slot_result = await db.execute(
-        select(PanditAvailability).where(
-            PanditAvailability.pandit_id == pandit.id,
-            func.date(PanditAvailability.date) == scheduled_date,
-            PanditAvailability.is_booked == False,
-            PanditAvailability.is_blocked == False,
-        )
-    )
-    available_slot = slot_result.scalars().first()
     if not available_slot:
         raise HTTPException(
             status_code=400,
@@ -169,24 +291,29 @@ async def create_booking(
         )
 
     # Step 4: Soft-lock slot in Redis
-    slot_key = f"{pandit.id}:{data.scheduled_at.isoformat()}"
+    # Acquire directly — the lock script is create-if-absent, so check and set are
+    # one atomic round-trip. The booking id is minted here so it can own the lock.
+    booking_id = uuid4()
     cache = RedisCache(redis)
-
-    existing_lock = await cache.get_slot_lock(str(pandit.id), data.scheduled_at.isoformat())
-    if existing_lock:
+    slot_iso = data.scheduled_at.isoformat()
+    if not await cache.lock_slot(str(pandit.id), slot_iso, str(booking_id), str(current_user.id)):
         raise HTTPException(
             status_code=409,
             detail="This slot is temporarily held by another booking. Please try again in a few minutes.",
         )
 
     # Step 5: Calculate amounts
-    pooja_fee = float(pandit.pooja_fees or {}).get(str(data.pooja_id), float(pandit.base_fee))
-    platform_fee = round(pooja_fee * settings.PLATFORM_COMMISSION_PERCENT / 100, 2)
-    total_amount = round(pooja_fee + platform_fee, 2)
-    pandit_payout = round(pooja_fee - platform_fee, 2)
+    # Integer paise throughout — no float rounding on money
+    fee_paise = int(Decimal(str((pandit.pooja_fees or {}).get(str(data.pooja_id), pandit.base_fee))) * 100)
+    platform_paise = fee_paise * _COMMISSION_BPS // 10_000
+    pooja_fee = Decimal(fee_paise) / 100
+    platform_fee = Decimal(platform_paise) / 100
+    total_amount = Decimal(fee_paise + platform_paise) / 100
+    pandit_payout = Decimal(fee_paise - platform_paise) / 100
 
     # Step 6: Create booking
     booking = Booking(
+        id=booking_id,
         booking_number=_generate_booking_number(),
         user_id=current_user.id,
         pandit_id=pandit.id,
@@ -200,17 +327,20 @@ async def create_booking(
         platform_fee=platform_fee,
         total_amount=total_amount,
         pandit_payout=pandit_payout,
-        accept_deadline=data.scheduled_at - timedelta(hours=settings.BOOKING_ACCEPT_DEADLINE_HOURS),
+        accept_deadline=data.scheduled_at - _ACCEPT_DEADLINE,
     )
     db.add(booking)
-    await db.flush()
-
-    # Lock slot in Redis
-    await cache.lock_slot(str(pandit.id), data.scheduled_at.isoformat(), str(booking.id))
 
     # Audit log
-    await _log_status_change(db, booking, None, BookingStatus.SLOT_LOCKED.value, current_user)
-    await db.commit()
+    _log_status_change(background_tasks, booking, None, BookingStatus.SLOT_LOCKED.value, current_user)
+
+    # The id is client-assigned, so no mid-request flush — the INSERT goes out with the commit
+    try:
+        await db.commit()
+    except Exception:
+        # Don't leave the slot held until TTL for a booking that was never written
+        await cache.release_slot(str(pandit.id), slot_iso, str(booking_id))
+        raise
 
     return _enrich_booking(booking)
 
@@ -220,6 +350,7 @@ async def create_booking(
 @router.post("/{booking_id}/payment-confirmed", include_in_schema=False)
 async def payment_confirmed(
     booking_id: UUID,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     redis=Depends(get_redis),
 ):
@@ -236,21 +367,19 @@ async def payment_confirmed(
     prev_status = booking.status.value
     booking.status = BookingStatus.AWAITING_PANDIT
 
-    # Audit log
-    from shared.models.models import Notification, NotificationType
     pandit_result = await db.execute(select(PanditProfile).where(PanditProfile.id == booking.pandit_id))
     pandit = pandit_result.scalar_one_or_none()
 
     if pandit:
         # Notify pandit
-        notif = Notification(
-            user_id=pandit.user_id,
-            booking_id=booking.id,
-            type=NotificationType.BOOKING_CREATED,
+        background_tasks.add_task(
+            _send_notification_async,
+            user_id=str(pandit.user_id),
+            notification_type="BOOKING_CREATED",
             title="New Booking Request 🙏",
             body=f"You have a new booking request for {booking.scheduled_at.strftime('%d %b %Y')}. Please accept or decline within {settings.BOOKING_ACCEPT_DEADLINE_HOURS} hours.",
+            booking_id=str(booking.id),
         )
-        db.add(notif)
 
     await db.commit()
     return {"status": "ok"}
@@ -267,35 +396,29 @@ async def accept_booking(
     redis=Depends(get_redis),
 ):
     """Pandit accepts the booking. Status: AWAITING_PANDIT → CONFIRMED."""
-    booking = await _get_booking_or_404(booking_id, db)
-
-    # Verify this pandit owns this booking
-    pandit_result = await db.execute(
-        select(PanditProfile).where(PanditProfile.user_id == current_user.id)
+    # Ownership, state and deadline are all guarded in one UPDATE
+    booking, accepted = await _transition_pandit_booking(
+        booking_id, current_user, db,
+        BookingStatus.AWAITING_PANDIT, BookingStatus.CONFIRMED,
+        {"confirmed_at": func.now()},
+        or_(Booking.accept_deadline.is_(None), Booking.accept_deadline >= func.now()),
+        forbidden_detail="Not authorized to accept this booking",
     )
-    pandit = pandit_result.scalar_one_or_none()
-    if not pandit or booking.pandit_id != pandit.id:
-        raise HTTPException(status_code=403, detail="Not authorized to accept this booking")
-
-    if booking.status != BookingStatus.AWAITING_PANDIT:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Cannot accept booking in '{booking.status.value}' state",
-        )
-
-    # Check deadline
-    if booking.accept_deadline and datetime.now(timezone.utc) > booking.accept_deadline:
+    if not accepted:
+        if booking.status != BookingStatus.AWAITING_PANDIT:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot accept booking in '{booking.status.value}' state",
+            )
         raise HTTPException(status_code=400, detail="Acceptance deadline has passed")
 
-    prev_status = booking.status.value
-    booking.status = BookingStatus.CONFIRMED
-    booking.confirmed_at = datetime.now(timezone.utc)
-
     # Mark slot as booked
+    day_start, day_end = _day_bounds(booking.scheduled_at.date())
     slot_result = await db.execute(
         select(PanditAvailability).where(
-            PanditAvailability.pandit_id == pandit.id,
-            func.date(PanditAvailability.date) == booking.scheduled_at.date(),
+            PanditAvailability.pandit_id == booking.pandit_id,
+            PanditAvailability.date >= day_start,
+            PanditAvailability.date < day_end,
             PanditAvailability.is_booked == False,
         )
     )
@@ -306,18 +429,20 @@ async def accept_booking(
 
     # Release Redis lock (permanent DB booking replaces it)
     cache = RedisCache(redis)
-    await cache.release_slot(str(pandit.id), booking.scheduled_at.isoformat())
+    await cache.release_slot(str(booking.pandit_id), booking.scheduled_at.isoformat(), str(booking.id))
 
-    await _log_status_change(db, booking, prev_status, BookingStatus.CONFIRMED.value, current_user)
+    _log_status_change(
+        background_tasks, booking, BookingStatus.AWAITING_PANDIT.value, BookingStatus.CONFIRMED.value, current_user
+    )
 
     # Notify user
-    await _send_notification_async(
+    background_tasks.add_task(
+        _send_notification_async,
         user_id=str(booking.user_id),
         notification_type="BOOKING_CONFIRMED",
         title="Booking Confirmed! 🎉",
         body=f"Your booking #{booking.booking_number} has been confirmed by the Pandit.",
         booking_id=str(booking.id),
-        db=db,
     )
 
     await db.commit()
@@ -337,42 +462,34 @@ async def decline_booking(
     Pandit declines the booking.
     Compensating transaction: release slot + trigger refund.
     """
-    booking = await _get_booking_or_404(booking_id, db)
-
-    pandit_result = await db.execute(
-        select(PanditProfile).where(PanditProfile.user_id == current_user.id)
+    booking, declined = await _transition_pandit_booking(
+        booking_id, current_user, db,
+        BookingStatus.AWAITING_PANDIT, BookingStatus.DECLINED,
+        {"decline_reason": data.reason, "cancelled_at": func.now()},
     )
-    pandit = pandit_result.scalar_one_or_none()
-    if not pandit or booking.pandit_id != pandit.id:
-        raise HTTPException(status_code=403, detail="Not authorized")
-
-    if booking.status != BookingStatus.AWAITING_PANDIT:
+    if not declined:
         raise HTTPException(status_code=400, detail=f"Cannot decline booking in '{booking.status.value}' state")
 
-    prev_status = booking.status.value
-    booking.status = BookingStatus.DECLINED
-    booking.decline_reason = data.reason
-    booking.cancelled_at = datetime.now(timezone.utc)
-
     # Release slot lock
     cache = RedisCache(redis)
-    await cache.release_slot(str(pandit.id), booking.scheduled_at.isoformat())
+    await cache.release_slot(str(booking.pandit_id), booking.scheduled_at.isoformat(), str(booking.id))
 
-    await _log_status_change(
-        db, booking, prev_status, BookingStatus.DECLINED.value, current_user, data.reason
+    _log_status_change(
+        background_tasks, booking, BookingStatus.AWAITING_PANDIT.value, BookingStatus.DECLINED.value,
+        current_user, data.reason,
     )
 
     # Trigger refund via Payment Service (in production: Kafka event)
     # kafka_producer.send("payment.events", {"type": "REFUND_REQUESTED", "booking_id": str(booking.id)})
 
     # Notify user
-    await _send_notification_async(
+    background_tasks.add_task(
+        _send_notification_async,
         user_id=str(booking.user_id),
         notification_type="BOOKING_DECLINED",
         title="Booking Declined",
         body=f"The Pandit has declined booking #{booking.booking_number}. A full refund will be processed within 3-5 business days.",
         booking_id=str(booking.id),
-        db=db,
     )
 
     await db.commit()
@@ -382,27 +499,22 @@ async def decline_booking(
 @router.post("/{booking_id}/complete", response_model=BookingResponse)
 async def complete_booking(
     booking_id: UUID,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_pandit),
     db: AsyncSession = Depends(get_db),
 ):
     """Pandit marks booking as completed. Triggers payout + review request."""
-    booking = await _get_booking_or_404(booking_id, db)
-
-    pandit_result = await db.execute(
-        select(PanditProfile).where(PanditProfile.user_id == current_user.id)
+    booking, completed = await _transition_pandit_booking(
+        booking_id, current_user, db,
+        BookingStatus.CONFIRMED, BookingStatus.COMPLETED,
+        {"completed_at": func.now()},
     )
-    pandit = pandit_result.scalar_one_or_none()
-    if not pandit or booking.pandit_id != pandit.id:
-        raise HTTPException(status_code=403, detail="Not authorized")
-
-    if booking.status != BookingStatus.CONFIRMED:
+    if not completed:
         raise HTTPException(status_code=400, detail="Booking must be CONFIRMED to complete")
 
-    prev_status = booking.status.value
-    booking.status = BookingStatus.COMPLETED
-    booking.completed_at = datetime.now(timezone.utc)
-
-    await _log_status_change(db, booking, prev_status, BookingStatus.COMPLETED.value, current_user)
+    _log_status_change(
+        background_tasks, booking, BookingStatus.CONFIRMED.value, BookingStatus.COMPLETED.value, current_user
+    )
 
     # Trigger payout (Kafka: payment.events → payout job)
     # Trigger review request notification (24hr delay via BullMQ)
@@ -415,6 +527,7 @@ async def complete_booking(
 async def cancel_booking(
     booking_id: UUID,
     data: BookingCancelRequest,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
     redis=Depends(get_redis),
@@ -423,50 +536,55 @@ async def cancel_booking(
     User or admin cancels a booking.
     Cancellation policy: full refund if >24hr before, 50% if <24hr.
     """
-    booking = await _get_booking_or_404(booking_id, db)
-
-    # Authorization: user can cancel own booking, admin can cancel any
-    if current_user.role == UserRole.USER and booking.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized")
-
-    cancellable_statuses = [
-        BookingStatus.SLOT_LOCKED,
-        BookingStatus.PAYMENT_PENDING,
-        BookingStatus.AWAITING_PANDIT,
-        BookingStatus.CONFIRMED,
+    # Guarded UPDATE … RETURNING. The self-join on `prev` reads the row as of
+    # statement start, so the pre-cancel status comes back for the audit log.
+    prev = aliased(Booking)
+    criteria = [
+        Booking.id == booking_id,
+        prev.id == Booking.id,
+        Booking.status.in_(_CANCELLABLE_STATUSES),
     ]
-    if booking.status not in cancellable_statuses:
+    # Authorization: user can cancel own booking, admin can cancel any
+    if current_user.role == UserRole.USER:
+        criteria.append(Booking.user_id == current_user.id)
+
+    row = (await db.execute(
+        update(Booking)
+        .where(*criteria)
+        .values(
+            status=BookingStatus.CANCELLED,
+            cancellation_reason=data.reason,
+            cancelled_by=current_user.role.value,
+            cancelled_at=func.now(),
+        )
+        .returning(Booking, prev.status)
+        .execution_options(synchronize_session=False)
+    )).first()
+    if not row:
+        booking = await _get_booking_or_404(booking_id, db)
+        if current_user.role == UserRole.USER and booking.user_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized")
         raise HTTPException(
             status_code=400,
             detail=f"Booking in '{booking.status.value}' state cannot be cancelled",
         )
+    booking, prev_status = row
 
-    prev_status = booking.status.value
-    booking.status = BookingStatus.CANCELLED
-    booking.cancellation_reason = data.reason
-    booking.cancelled_by = current_user.role.value
-    booking.cancelled_at = datetime.now(timezone.utc)
-
-    # Release slot lock if still held
-    pandit_result = await db.execute(
-        select(PanditProfile).where(PanditProfile.id == booking.pandit_id)
+    # Release slot lock if still held, and un-book the slot if it was marked
+    # booked — independent Redis and DB calls, so they run concurrently
+    cache = RedisCache(redis)
+    await asyncio.gather(
+        cache.release_slot(str(booking.pandit_id), booking.scheduled_at.isoformat(), str(booking.id)),
+        db.execute(
+            update(PanditAvailability)
+            .where(PanditAvailability.booking_id == booking.id)
+            .values(is_booked=False, booking_id=None)
+            .execution_options(synchronize_session=False)
+        ),
     )
-    pandit = pandit_result.scalar_one_or_none()
-    if pandit:
-        cache = RedisCache(redis)
-        await cache.release_slot(str(pandit.id), booking.scheduled_at.isoformat())
-
-        # Un-book the slot if it was marked booked
-        slot_result = await db.execute(
-            select(PanditAvailability).where(PanditAvailability.booking_id == booking.id)
-        )
-        slot = slot_result.scalar_one_or_none()
-        if slot:
-            slot.is_booked = False
-            slot.booking_id = None
 
-    await _log_status_change(
-        db, booking, prev_status, BookingStatus.CANCELLED.value, current_user, data.reason
+    _log_status_change(
+        background_tasks, booking, prev_status.value, BookingStatus.CANCELLED.value, current_user, data.reason
     )
 
     # Trigger refund
@@ -491,11 +609,8 @@ async def get_booking(
     if current_user.role == UserRole.USER and booking.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     elif current_user.role == UserRole.PANDIT:
-        pandit_result = await db.execute(
-            select(PanditProfile).where(PanditProfile.user_id == current_user.id)
-        )
-        pandit = pandit_result.scalar_one_or_none()
-        if not pandit or booking.pandit_id != pandit.id:
+        pandit_id = await db.scalar(_PANDIT_ID_BY_USER_ID_STMT, {"uid": current_user.id})
+        if not pandit_id or booking.pandit_id != pandit_id:
             raise HTTPException(status_code=403, detail="Not authorized")
 
     return _enrich_booking(booking)
@@ -511,15 +626,12 @@ async def list_my_bookings(
 ):
     """List bookings for the current user. Pandits see bookings assigned to them."""
     if current_user.role == UserRole.PANDIT:
-        pandit_result = await db.execute(
-            select(PanditProfile).where(PanditProfile.user_id == current_user.id)
-        )
-        pandit = pandit_result.scalar_one_or_none()
-        if not pandit:
+        pandit_id = await db.scalar(_PANDIT_ID_BY_USER_ID_STMT, {"uid": current_user.id})
+        if not pandit_id:
             return []
-        query = select(Booking).where(Booking.pandit_id == pandit.id)
+        query = select(*_BOOKING_RESPONSE_COLUMNS).where(Booking.pandit_id == pandit_id)
     else:
-        query = select(Booking).where(Booking.user_id == current_user.id)
+        query = select(*_BOOKING_RESPONSE_COLUMNS).where(Booking.user_id == current_user.id)
 
     if status_filter:
         try:
@@ -528,6 +640,6 @@ async def list_my_bookings(
             raise HTTPException(status_code=400, detail=f"Invalid status: {status_filter}")
 
     query = query.order_by(Booking.created_at.desc()).offset((page - 1) * page_size).limit(page_size)
+    # Plain rows, no ORM identity map; trusted DB values skip model validation
     result = await db.execute(query)
-    bookings = result.scalars().all()
-    return [_enrich_booking(b) for b in bookings]
+    return [BookingResponse.model_construct(**row) for row in result.mappings()]
@@ -1,38 +1,54 @@
 """
 services/notification/router.py
 Notification delivery: FCM push, Twilio SMS, Resend email.
-In-app notifications via WebSocket.
+In-app notifications via WebSocket, fanned out over Redis pub/sub.
 """
 
+import asyncio
+import random
+import textwrap
 from datetime import datetime, timezone
+from functools import lru_cache, partial
+from html import escape
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select, update
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect, status
+from jose import JWTError
+from sqlalchemy import select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from config.database import get_db
+import config.redis_client as redis_state
+from config.database import get_db, run_after_commit
+from config.notification_clients import get_firebase_app, get_resend, get_twilio_client
+from config.redis_client import RedisCache, get_redis
 from config.settings import settings
 from shared.middleware.auth import get_current_user
 from shared.models.models import Notification, User
 from shared.schemas.schemas import MessageResponse, NotificationResponse
+from shared.utils.notifications import create_notification
+from shared.utils.pagination import decode_cursor, encode_cursor, paginate
+from shared.utils.security import verify_access_token_cached
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
 
 # ── Notification Senders ──────────────────────────────────────
+# In-process fallbacks; the delivery path is the Celery channel tasks queued by
+# dispatch_notification. The provider SDKs are blocking, so each call runs in a
+# worker thread to keep the event loop free. A thread can't be cancelled, so
+# the deadline is the provider client's own (PROVIDER_TIMEOUT), not asyncio's.
+
+
+async def _call_provider(fn, *args, **kwargs):
+    return await asyncio.to_thread(fn, *args, **kwargs)
+
 
 async def send_fcm_push(fcm_token: str, title: str, body: str, data: dict = None) -> bool:
     """Send Firebase Cloud Messaging push notification."""
     try:
-        import firebase_admin
         from firebase_admin import messaging
 
-        if not firebase_admin._apps:
-            import firebase_admin.credentials as credentials
-            cred = credentials.Certificate(settings.FIREBASE_CREDENTIALS_PATH)
-            firebase_admin.initialize_app(cred)
-
+        app = get_firebase_app()
         message = messaging.Message(
             notification=messaging.Notification(title=title, body=body),
             data={k: str(v) for k, v in (data or {}).items()},
@@ -50,7 +66,7 @@ async def send_fcm_push(fcm_token: str, title: str, body: str, data: dict = None
                 )
             ),
         )
-        messaging.send(message)
+        await _call_provider(messaging.send, message, app=app)
         return True
     except Exception as e:
         # Log but don't fail — notification is non-critical
@@ -61,9 +77,8 @@ async def send_fcm_push(fcm_token: str, title: str, body: str, data: dict = None
 async def send_sms(phone_number: str, message: str) -> bool:
     """Send SMS via Twilio."""
     try:
-        from twilio.rest import Client
-        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-        client.messages.create(
+        await _call_provider(
+            get_twilio_client().messages.create,
             body=message,
             from_=settings.TWILIO_FROM_NUMBER,
             to=phone_number,
@@ -77,9 +92,7 @@ async def send_sms(phone_number: str, message: str) -> bool:
 async def send_email(to_email: str, to_name: str, subject: str, html_body: str) -> bool:
     """Send transactional email via Resend."""
     try:
-        import resend
-        resend.api_key = settings.RESEND_API_KEY
-        resend.Emails.send({
+        await _call_provider(get_resend().Emails.send, {
             "from": f"{settings.EMAIL_FROM_NAME} <{settings.EMAIL_FROM}>",
             "to": [f"{to_name} <{to_email}>"],
             "subject": subject,
@@ -127,6 +140,35 @@ TEMPLATES = {
 }
 
 
+# Time-sensitive types jump the per-channel queues
+_PRIORITY_TYPES = frozenset({"PAYMENT_SUCCESS"})
+
+# Email shell, dedented once at import; only title/body are substituted per send
+_EMAIL_HTML = textwrap.dedent("""\
+    <div style="font-family: sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+        <div style="background: #FF6B00; padding: 20px; border-radius: 8px 8px 0 0; text-align: center;">
+            <h1 style="color: white; margin: 0;">🕉️ Pandit Booking</h1>
+        </div>
+        <div style="background: white; padding: 24px; border: 1px solid #eee; border-radius: 0 0 8px 8px;">
+            <h2 style="color: #333;">{title}</h2>
+            <p style="color: #666; line-height: 1.6;">{body}</p>
+            <p style="color: #999; font-size: 12px; margin-top: 24px;">
+                You received this email because you have an account on Pandit Booking.
+            </p>
+        </div>
+    </div>
+    """)
+
+
+@lru_cache(maxsize=256)
+def _render_email(title: str, body: str) -> str:
+    """
+    Fill the email shell, HTML-escaping the text. Memoized: fully static types
+    (e.g. ACCOUNT_VERIFIED) render once; templated ones just fall through.
+    """
+    return _EMAIL_HTML.format(title=escape(title), body=escape(body))
+
+
 async def dispatch_notification(
     db: AsyncSession,
     user: User,
@@ -139,12 +181,16 @@ async def dispatch_notification(
 ):
     """
     Central notification dispatcher.
-    1. Save to DB (in-app)
-    2. Send push via FCM
-    3. Send SMS via Twilio
-    4. Send email via Resend
+    1. Save to DB (in-app) via create_notification
+    2. Queue push / SMS / email, each on its own Celery queue
+
+    Returns once the row is added; the channel tasks, cache invalidation and
+    WebSocket publish run after the caller's transaction commits. Channels are
+    independent tasks, so a slow SMS provider never holds up push or email;
+    each task sets its sent_* flag on the row when delivery succeeds.
     """
     from shared.models.models import NotificationType
+    from tasks.notification_tasks import send_email, send_push_notification, send_sms as send_sms_task
 
     template = TEMPLATES.get(notification_type, {})
     vars_ = template_vars or {}
@@ -158,73 +204,82 @@ async def dispatch_notification(
     except KeyError:
         notif_type = NotificationType.BOOKING_CREATED
 
-    notif = Notification(
-        user_id=user.id,
-        booking_id=booking_id,
-        type=notif_type,
-        title=title,
-        body=body,
-    )
-    db.add(notif)
+    # Repeats of the same (user, type, booking) event are dropped here,
+    # before any provider is touched
+    created = await create_notification(db, user.id, notif_type, title, body, booking_id)
+    if created is None:
+        return
+    notification_id = str(created)
+
+    # Redis broker priorities are inverted: 0 is served first
+    priority = 0 if notification_type in _PRIORITY_TYPES else 5
+
+    # Channel tasks load and update the row, so each is enqueued only once it
+    # is committed — and never for a transaction that rolls back
+    def _enqueue(task, *args):
+        run_after_commit(db, partial(
+            task.apply_async, args=list(args), kwargs={"notification_id": notification_id}, priority=priority,
+        ))
 
     # 2. FCM Push
     if send_push and user.fcm_token:
-        success = await send_fcm_push(user.fcm_token, title, body, {"booking_id": booking_id or ""})
-        notif.sent_push = success
+        _enqueue(send_push_notification, user.fcm_token, title, body, {"booking_id": booking_id or ""})
 
     # 3. SMS
     sms_template = template.get("sms")
     if send_sms_ and sms_template and user.phone:
-        sms_body = sms_template.format(**vars_)
-        success = await send_sms(user.phone, sms_body)
-        notif.sent_sms = success
+        _enqueue(send_sms_task, user.phone, sms_template.format(**vars_))
 
     # 4. Email
     if send_email_:
-        subject = title
-        html_body = f"""
-        <div style="font-family: sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
-            <div style="background: #FF6B00; padding: 20px; border-radius: 8px 8px 0 0; text-align: center;">
-                <h1 style="color: white; margin: 0;">🕉️ Pandit Booking</h1>
-            </div>
-            <div style="background: white; padding: 24px; border: 1px solid #eee; border-radius: 0 0 8px 8px;">
-                <h2 style="color: #333;">{title}</h2>
-                <p style="color: #666; line-height: 1.6;">{body}</p>
-                <p style="color: #999; font-size: 12px; margin-top: 24px;">
-                    You received this email because you have an account on Pandit Booking.
-                </p>
-            </div>
-        </div>
-        """
-        success = await send_email(user.email, user.name, subject, html_body)
-        notif.sent_email = success
-
-    await db.flush()
+        _enqueue(send_email, user.email, title, _render_email(title, body))
 
 
 # ── REST Endpoints ────────────────────────────────────────────
 
-@router.get("", response_model=list[NotificationResponse])
+@router.get("")
 async def get_my_notifications(
     unread_only: bool = Query(False),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=50),
+    cursor: str = Query(None, description="next_cursor from the previous page (keyset pagination)"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get authenticated user's in-app notifications."""
+    """
+    Get authenticated user's in-app notifications, newest first.
+    Pass `cursor` to page by keyset on (created_at, id) — cost is independent
+    of depth, but `total` is skipped. Without it, pages include the total.
+    """
     query = (
         select(Notification)
         .where(Notification.user_id == current_user.id)
-        .order_by(Notification.created_at.desc())
+        .order_by(Notification.created_at.desc(), Notification.id.desc())
     )
 
     if unread_only:
         query = query.where(Notification.is_read == False)
 
-    query = query.offset((page - 1) * page_size).limit(page_size)
-    result = await db.execute(query)
-    return [NotificationResponse.model_validate(n) for n in result.scalars()]
+    if cursor:
+        cursor_ts, cursor_id = decode_cursor(cursor)
+        query = query.where(tuple_(Notification.created_at, Notification.id) < (cursor_ts, cursor_id))
+        result = await db.execute(query.limit(page_size))
+        notifications = result.scalars().all()
+        total = None
+    else:
+        rows, total = await paginate(db, query, page, page_size)
+        notifications = [row[0] for row in rows]
+
+    return {
+        "items": [NotificationResponse.model_validate(n) for n in notifications],
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "next_cursor": (
+            encode_cursor(notifications[-1].created_at, notifications[-1].id)
+            if len(notifications) == page_size else None
+        ),
+    }
 
 
 @router.post("/{notification_id}/read", response_model=MessageResponse)
@@ -232,13 +287,23 @@ async def mark_read(
     notification_id: UUID,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
+    redis=Depends(get_redis),
 ):
-    await db.execute(
+    # RETURNING tells us whether this call flipped the row, so the cached
+    # badge count can follow it — once get_db has committed the flip
+    marked = await db.scalar(
         update(Notification)
-        .where(Notification.id == notification_id, Notification.user_id == current_user.id)
+        .where(
+            Notification.id == notification_id,
+            Notification.user_id == current_user.id,
+            Notification.is_read == False,
+        )
         .values(is_read=True, read_at=datetime.now(timezone.utc))
+        .returning(Notification.id)
     )
-    await db.commit()
+    if marked:
+        user_id = str(current_user.id)
+        run_after_commit(db, lambda: RedisCache(redis).decr_unread_count(user_id))
     return MessageResponse(message="Marked as read")
 
 
@@ -246,13 +311,17 @@ async def mark_read(
 async def mark_all_read(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
+    redis=Depends(get_redis),
 ):
     await db.execute(
         update(Notification)
         .where(Notification.user_id == current_user.id, Notification.is_read == False)
         .values(is_read=True, read_at=datetime.now(timezone.utc))
     )
-    await db.commit()
+    # Zeroed only once get_db commits: a rollback mustn't leave a 0 badge over
+    # unread rows, and a poll that recounted before the commit gets overwritten
+    user_id = str(current_user.id)
+    run_after_commit(db, lambda: RedisCache(redis).set_unread_count(user_id, 0))
     return MessageResponse(message="All notifications marked as read")
 
 
@@ -260,12 +329,114 @@ async def mark_all_read(
 async def unread_count(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
+    redis=Depends(get_redis),
 ):
-    from sqlalchemy import func
-    count = await db.scalar(
-        select(func.count(Notification.id)).where(
-            Notification.user_id == current_user.id,
-            Notification.is_read == False,
-        )
-    )
-    return {"unread_count": count or 0}
+    """
+    Unread badge count, polled by the apps. Served from a 30s Redis cache.
+    Notifications created through the API (create_notification /
+    dispatch_notification) and mark-read adjust it once their transaction
+    commits; rows written by Celery workers show up once the TTL lapses.
+    """
+    cache = RedisCache(redis)
+    count = await cache.get_unread_count(str(current_user.id))
+    if count is None:
+        from sqlalchemy import func
+        count = await db.scalar(
+            select(func.count(Notification.id)).where(
+                Notification.user_id == current_user.id,
+                Notification.is_read == False,
+            )
+        ) or 0
+        await cache.set_unread_count(str(current_user.id), count)
+    return {"unread_count": count}
+
+
+# ── WebSocket ─────────────────────────────────────────────────
+
+_RESUBSCRIBE_MIN = 0.5
+_RESUBSCRIBE_MAX = 30.0
+
+
+class _NotificationHub:
+    """
+    Per-process fan-out. One pattern subscription to notif:* serves every
+    socket on this worker, so open sockets don't each pin a Redis connection.
+    """
+
+    def __init__(self):
+        self._sockets: dict[str, set[WebSocket]] = {}
+        self._task: asyncio.Task | None = None
+
+    def connect(self, user_id: str, websocket: WebSocket) -> None:
+        self._sockets.setdefault(user_id, set()).add(websocket)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+
+    def disconnect(self, user_id: str, websocket: WebSocket) -> None:
+        sockets = self._sockets.get(user_id)
+        if sockets is not None:
+            sockets.discard(websocket)
+            if not sockets:
+                del self._sockets[user_id]
+
+    async def _listen(self) -> None:
+        # Resubscribe with capped backoff while anyone is connected; a dropped
+        # Redis connection would otherwise leave every socket here silently idle.
+        # Anything published during the gap is picked up by the next list fetch.
+        delay = _RESUBSCRIBE_MIN
+        while self._sockets:
+            pubsub = redis_state.redis_client.pubsub()
+            try:
+                await pubsub.psubscribe("notif:*")
+                delay = _RESUBSCRIBE_MIN
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    user_id = message["channel"].split(":", 1)[1]
+                    for websocket in list(self._sockets.get(user_id, ())):
+                        try:
+                            await websocket.send_text(message["data"])
+                        except Exception:
+                            self.disconnect(user_id, websocket)
+            except Exception as e:
+                print(f"Notification hub subscription lost: {e}")
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(delay + random.uniform(0, delay))
+            delay = min(delay * 2, _RESUBSCRIBE_MAX)
+
+
+_hub = _NotificationHub()
+
+
+@router.websocket("/ws")
+async def notifications_ws(websocket: WebSocket, token: str = Query(...)):
+    """
+    Server push for in-app notifications. Browsers can't set an Authorization
+    header on a WebSocket, so the access token comes as ?token=. Each new
+    notification arrives as one NotificationResponse-shaped JSON message;
+    clients bump their unread badge locally instead of polling /unread-count.
+    """
+    try:
+        payload = verify_access_token_cached(token)
+    except JWTError:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if await redis_state.redis_client.exists(f"jwt_revoked:{payload['jti']}"):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    user_id = payload["sub"]
+    await websocket.accept()
+    _hub.connect(user_id, websocket)
+    try:
+        # Nothing is expected from the client; this just waits for the disconnect
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        _hub.disconnect(user_id, websocket)
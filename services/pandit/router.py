@@ -3,19 +3,22 @@ services/pandit/router.py
 Pandit profile management: CRUD, availability, geo location, earnings.
 """
 
-import json
-from datetime import datetime, timezone
+import asyncio
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from geoalchemy2.functions import ST_AsGeoJSON, ST_MakePoint, ST_SetSRID
-from sqlalchemy import delete, func, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from geoalchemy2 import Geometry
+from geoalchemy2.functions import ST_MakePoint, ST_SetSRID
+from sqlalchemy import cast, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from config.database import get_db
+from config.database import get_db, run_after_commit
 from config.redis_client import RedisCache, get_redis
-from shared.middleware.auth import get_current_user, require_pandit
+from config.settings import settings
+from shared.middleware.auth import get_current_pandit, get_current_user, require_pandit
 from shared.models.models import (
     Booking,
     BookingStatus,
@@ -34,6 +37,8 @@ from shared.schemas.schemas import (
     PanditProfileResponse,
     PanditProfileUpdate,
 )
+from shared.utils.dates import day_bounds
+from shared.utils.pagination import paginate
 
 router = APIRouter(prefix="/pandits", tags=["Pandits"])
 
@@ -50,19 +55,31 @@ async def _get_pandit_or_404(pandit_id: UUID, db: AsyncSession) -> PanditProfile
     return pandit
 
 
-async def _enrich_profile(pandit: PanditProfile, db: AsyncSession) -> PanditProfileResponse:
-    """Add name, avatar from joined User, and extract lat/lng from PostGIS point."""
-    result = await db.execute(select(User).where(User.id == pandit.user_id))
-    user = result.scalar_one_or_none()
+_LOCATION_POINT = cast(PanditProfile.location, Geometry)
 
-    lat, lng = None, None
-    if pandit.location is not None:
-        geo_json = await db.scalar(
-            select(ST_AsGeoJSON(pandit.location))
+
+async def _enrich_profile(db: AsyncSession, *criteria) -> Optional[PanditProfileResponse]:
+    """
+    Load a profile with its User's name/avatar and lat/lng in one round-trip.
+    ST_X/ST_Y read the coordinates server-side — no GeoJSON to fetch or parse.
+    Returns None if no profile matches.
+    """
+    result = await db.execute(
+        select(
+            PanditProfile,
+            User.name,
+            User.avatar_url,
+            func.ST_Y(_LOCATION_POINT),
+            func.ST_X(_LOCATION_POINT),
         )
-        if geo_json:
-            coords = json.loads(geo_json)["coordinates"]
-            lng, lat = coords[0], coords[1]
+        .join(User, User.id == PanditProfile.user_id)
+        .where(*criteria)
+        .execution_options(populate_existing=True)
+    )
+    row = result.first()
+    if not row:
+        return None
+    pandit, name, avatar_url, lat, lng = row
 
     return PanditProfileResponse(
         **{
@@ -72,29 +89,49 @@ async def _enrich_profile(pandit: PanditProfile, db: AsyncSession) -> PanditProf
         },
         latitude=lat,
         longitude=lng,
-        name=user.name if user else None,
-        avatar_url=user.avatar_url if user else None,
+        name=name,
+        avatar_url=avatar_url,
     )
 
 
 # ── Public Endpoints ──────────────────────────────────────────
 
+# Cache-miss waiters poll for up to ~0.5s before rebuilding the entry themselves
+_CACHE_WAIT_POLLS = 10
+_CACHE_WAIT_INTERVAL = 0.05
+
+
 @router.get("/{pandit_id}", response_model=PanditProfileResponse)
 async def get_pandit(pandit_id: UUID, db: AsyncSession = Depends(get_db), redis=Depends(get_redis)):
     """Get a pandit's public profile. Cached for 5 minutes."""
-    cache = RedisCache(redis)
     cache_key = f"pandit:{pandit_id}"
 
-    cached = await cache.get(cache_key)
+    # Cached as the serialized response body — a hit is returned verbatim
+    cached = await redis.get(cache_key)
     if cached:
-        return PanditProfileResponse(**cached)
-
-    pandit = await _get_pandit_or_404(pandit_id, db)
-    if pandit.verification_status != VerificationStatus.VERIFIED:
-        raise HTTPException(status_code=404, detail="Pandit not found or not verified")
-
-    profile = await _enrich_profile(pandit, db)
-    await cache.set(cache_key, profile.model_dump())
+        return Response(content=cached, media_type="application/json")
+
+    # Stampede guard: one request rebuilds the entry, others wait briefly for it
+    lock_key = f"{cache_key}:lock"
+    locked = await redis.set(lock_key, 1, nx=True, ex=5)
+    if not locked:
+        for _ in range(_CACHE_WAIT_POLLS):
+            await asyncio.sleep(_CACHE_WAIT_INTERVAL)
+            cached = await redis.get(cache_key)
+            if cached:
+                return Response(content=cached, media_type="application/json")
+
+    try:
+        profile = await _enrich_profile(db, PanditProfile.id == pandit_id)
+        if not profile:
+            raise HTTPException(status_code=404, detail="Pandit not found")
+        if profile.verification_status != VerificationStatus.VERIFIED:
+            raise HTTPException(status_code=404, detail="Pandit not found or not verified")
+
+        await redis.setex(cache_key, settings.REDIS_CACHE_TTL, profile.model_dump_json())
+    finally:
+        if locked:
+            await redis.delete(lock_key)
     return profile
 
 
@@ -115,12 +152,14 @@ async def get_pandit_availability(
 
     if date:
         try:
-            target_date = datetime.strptime(date, "%Y-%m-%d")
-            query = query.where(func.date(PanditAvailability.date) == target_date.date())
+            day_start, day_end = day_bounds(date)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+        query = query.where(
+            PanditAvailability.date >= day_start,
+            PanditAvailability.date < day_end,
+        )
     else:
-        from datetime import timedelta
         now = datetime.now(timezone.utc)
         query = query.where(
             PanditAvailability.date >= now,
@@ -150,11 +189,8 @@ async def get_pandit_reviews(
         .where(Review.pandit_id == pandit.id, Review.is_visible == True)
         .order_by(Review.created_at.desc())
     )
-    total_result = await db.execute(select(func.count()).select_from(query.subquery()))
-    total = total_result.scalar()
-
-    result = await db.execute(query.offset((page - 1) * page_size).limit(page_size))
-    reviews = result.scalars().all()
+    rows, total = await paginate(db, query, page, page_size)
+    reviews = [row[0] for row in rows]
 
     return {
         "items": [ReviewResponse.model_validate(r) for r in reviews],
@@ -172,13 +208,10 @@ async def get_my_profile(
     db: AsyncSession = Depends(get_db),
 ):
     """Get the authenticated pandit's own profile."""
-    result = await db.execute(
-        select(PanditProfile).where(PanditProfile.user_id == current_user.id)
-    )
-    pandit = result.scalar_one_or_none()
-    if not pandit:
+    profile = await _enrich_profile(db, PanditProfile.user_id == current_user.id)
+    if not profile:
         raise HTTPException(status_code=404, detail="Pandit profile not found. Please complete setup.")
-    return await _enrich_profile(pandit, db)
+    return profile
 
 
 @router.put("/me/profile", response_model=PanditProfileResponse)
@@ -211,11 +244,6 @@ async def update_my_profile(
         pandit.location = ST_SetSRID(
             ST_MakePoint(update_data.longitude, update_data.latitude), 4326
         )
-        # Update Redis GEO for real-time nearby queries
-        cache = RedisCache(redis)
-        await cache.add_pandit_location(
-            str(pandit.id), update_data.longitude, update_data.latitude
-        )
 
     # Check if profile is complete
     pandit.profile_complete = all([
@@ -229,68 +257,72 @@ async def update_my_profile(
 
     await db.flush()
 
-    # Invalidate cache
-    cache = RedisCache(redis)
-    await cache.delete(f"pandit:{pandit.id}")
-
     # TODO: Emit PanditUpdated event to Kafka → Elasticsearch re-index
     # await kafka_producer.send("pandit.updates", {...})
 
-    profile = await _enrich_profile(pandit, db)
+    profile = await _enrich_profile(db, PanditProfile.id == pandit.id)
+
+    # Write-through: the public GET serves this body verbatim (verified pandits
+    # only). Deferred to after get_db commits so a failed commit never leaves
+    # an unsaved profile — or position — in Redis.
+    cache_key = f"pandit:{pandit.id}"
+    if profile.verification_status == VerificationStatus.VERIFIED:
+        body = profile.model_dump_json()
+        run_after_commit(db, lambda: redis.setex(cache_key, settings.REDIS_CACHE_TTL, body))
+    else:
+        run_after_commit(db, lambda: redis.delete(cache_key))
+
+    if update_data.latitude is not None and update_data.longitude is not None:
+        # Redis GEO for real-time nearby queries
+        pandit_id, lng, lat = str(pandit.id), update_data.longitude, update_data.latitude
+        run_after_commit(db, lambda: RedisCache(redis).add_pandit_location(pandit_id, lng, lat))
     return profile
 
 
 @router.put("/me/availability", response_model=MessageResponse)
 async def update_my_availability(
     data: PanditAvailabilityUpdate,
-    current_user: User = Depends(require_pandit),
+    pandit: PanditProfile = Depends(get_current_pandit),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Set/replace availability slots for the pandit.
     If replace_date is provided, all existing slots for that date are deleted first.
     """
-    result = await db.execute(
-        select(PanditProfile).where(PanditProfile.user_id == current_user.id)
-    )
-    pandit = result.scalar_one_or_none()
-    if not pandit:
-        raise HTTPException(status_code=404, detail="Pandit profile not found")
-
     if data.replace_date:
         try:
-            target_date = datetime.strptime(data.replace_date, "%Y-%m-%d")
-            await db.execute(
-                delete(PanditAvailability).where(
-                    PanditAvailability.pandit_id == pandit.id,
-                    func.date(PanditAvailability.date) == target_date.date(),
-                    PanditAvailability.is_booked == False,
-                )
-            )
+            day_start, day_end = day_bounds(data.replace_date)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid replace_date format")
+        await db.execute(
+            delete(PanditAvailability).where(
+                PanditAvailability.pandit_id == pandit.id,
+                PanditAvailability.date >= day_start,
+                PanditAvailability.date < day_end,
+                PanditAvailability.is_booked == False,
+            )
+        )
 
+    rows = []
     for slot in data.slots:
         try:
-            slot_date = datetime.strptime(slot.date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            slot_date, _ = day_bounds(slot.date)
         except ValueError:
             raise HTTPException(status_code=400, detail=f"Invalid date: {slot.date}")
-
-        # Check for conflicts with existing booked slots
-        existing = await db.execute(
-            select(PanditAvailability).where(
-                PanditAvailability.pandit_id == pandit.id,
-                func.date(PanditAvailability.date) == slot_date.date(),
-                PanditAvailability.start_time == slot.start_time,
-            )
+        rows.append({
+            "pandit_id": pandit.id,
+            "date": slot_date,
+            "start_time": slot.start_time,
+            "end_time": slot.end_time,
+        })
+
+    # One INSERT for all slots; slots that already exist (same day + start) are skipped
+    if rows:
+        await db.execute(
+            pg_insert(PanditAvailability)
+            .values(rows)
+            .on_conflict_do_nothing(constraint="uq_availability_pandit_date_start")
         )
-        if not existing.scalar_one_or_none():
-            db.add(PanditAvailability(
-                pandit_id=pandit.id,
-                date=slot_date,
-                start_time=slot.start_time,
-                end_time=slot.end_time,
-            ))
 
     await db.commit()
     return MessageResponse(message=f"{len(data.slots)} availability slots updated")
@@ -300,28 +332,20 @@ async def update_my_availability(
 async def get_my_calendar(
     month: int = Query(..., ge=1, le=12),
     year: int = Query(..., ge=2024),
-    current_user: User = Depends(require_pandit),
+    pandit: PanditProfile = Depends(get_current_pandit),
     db: AsyncSession = Depends(get_db),
 ):
     """Get calendar view: all bookings + availability for a given month."""
-    result = await db.execute(
-        select(PanditProfile).where(PanditProfile.user_id == current_user.id)
-    )
-    pandit = result.scalar_one_or_none()
-    if not pandit:
-        raise HTTPException(status_code=404, detail="Pandit profile not found")
-
-    import calendar
-    _, last_day = calendar.monthrange(year, month)
+    # Half-open month range; end is the first instant of the next month
     start = datetime(year, month, 1, tzinfo=timezone.utc)
-    end = datetime(year, month, last_day, 23, 59, 59, tzinfo=timezone.utc)
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
 
     # Get bookings
     bookings_result = await db.execute(
         select(Booking).where(
             Booking.pandit_id == pandit.id,
             Booking.scheduled_at >= start,
-            Booking.scheduled_at <= end,
+            Booking.scheduled_at < end,
             Booking.status.in_([
                 BookingStatus.CONFIRMED,
                 BookingStatus.IN_PROGRESS,
@@ -336,7 +360,7 @@ async def get_my_calendar(
         select(PanditAvailability).where(
             PanditAvailability.pandit_id == pandit.id,
             PanditAvailability.date >= start,
-            PanditAvailability.date <= end,
+            PanditAvailability.date < end,
         )
     )
     slots = slots_result.scalars().all()
@@ -370,48 +394,28 @@ async def get_my_calendar(
 
 @router.get("/me/earnings")
 async def get_my_earnings(
-    current_user: User = Depends(require_pandit),
+    pandit: PanditProfile = Depends(get_current_pandit),
     db: AsyncSession = Depends(get_db),
 ):
     """Earnings summary: lifetime, current month, pending payout."""
-    result = await db.execute(
-        select(PanditProfile).where(PanditProfile.user_id == current_user.id)
-    )
-    pandit = result.scalar_one_or_none()
-    if not pandit:
-        raise HTTPException(status_code=404, detail="Pandit profile not found")
-
-    # Total lifetime earnings
-    total_result = await db.execute(
-        select(func.sum(Payment.payout_amount)).where(
-            Payment.status == PaymentStatus.CAPTURED,
-            Payment.booking_id.in_(
-                select(Booking.id).where(Booking.pandit_id == pandit.id)
-            ),
-        )
-    )
-    total_earned = total_result.scalar() or 0
-
-    # Pending (completed bookings, not yet paid out)
-    pending_result = await db.execute(
-        select(func.sum(Booking.pandit_payout)).where(
-            Booking.pandit_id == pandit.id,
-            Booking.status == BookingStatus.COMPLETED,
-        )
-    )
-    pending_payout = pending_result.scalar() or 0
-
-    # This month's bookings count
+    # Lifetime earnings, pending payout and this month's count in one pass.
+    # Payment is 1-to-1 with Booking, so the outer join never double-counts.
     now = datetime.now(timezone.utc)
     month_start = datetime(now.year, now.month, 1, tzinfo=timezone.utc)
-    month_result = await db.execute(
-        select(func.count()).where(
-            Booking.pandit_id == pandit.id,
-            Booking.status == BookingStatus.COMPLETED,
-            Booking.completed_at >= month_start,
+    completed = Booking.status == BookingStatus.COMPLETED
+    result = await db.execute(
+        select(
+            func.coalesce(
+                func.sum(Payment.payout_amount).filter(Payment.status == PaymentStatus.CAPTURED), 0
+            ).label("total_earned"),
+            func.coalesce(func.sum(Booking.pandit_payout).filter(completed), 0).label("pending_payout"),
+            func.count().filter(completed, Booking.completed_at >= month_start).label("bookings_this_month"),
         )
+        .select_from(Booking)
+        .outerjoin(Payment, Payment.booking_id == Booking.id)
+        .where(Booking.pandit_id == pandit.id)
     )
-    bookings_this_month = month_result.scalar() or 0
+    total_earned, pending_payout, bookings_this_month = result.one()
 
     return {
         "total_earned": float(total_earned),
@@ -426,25 +430,21 @@ async def get_my_earnings(
 async def update_my_location(
     latitude: float = Query(..., ge=-90, le=90),
     longitude: float = Query(..., ge=-180, le=180),
-    current_user: User = Depends(require_pandit),
+    pandit: PanditProfile = Depends(get_current_pandit),
     db: AsyncSession = Depends(get_db),
     redis=Depends(get_redis),
 ):
     """
     Real-time location update from pandit's mobile app (called every ~5min).
-    Updates PostGIS + Redis GEO.
+    Redis GEO is updated on every call; the PostGIS column only when the
+    last write is older than 15 min or the pandit moved 50m or more.
     """
-    result = await db.execute(
-        select(PanditProfile).where(PanditProfile.user_id == current_user.id)
-    )
-    pandit = result.scalar_one_or_none()
-    if not pandit:
-        raise HTTPException(status_code=404, detail="Pandit profile not found")
-
-    pandit.location = ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)
-
-    # Update Redis GEO
     cache = RedisCache(redis)
-    await cache.add_pandit_location(str(pandit.id), longitude, latitude)
+    if await cache.update_pandit_location(str(pandit.id), longitude, latitude):
+        await db.execute(
+            update(PanditProfile)
+            .where(PanditProfile.id == pandit.id)
+            .values(location=ST_SetSRID(ST_MakePoint(longitude, latitude), 4326))
+        )
 
     return MessageResponse(message="Location updated")
@@ -4,21 +4,24 @@ Razorpay payment integration: order creation, webhook verification,
 escrow management, and pandit payouts.
 """
 
-import hashlib
-import hmac
 from datetime import datetime, timezone
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlalchemy import select
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+import config.razorpay_client as razorpay_client
 from config.database import get_db
 from config.settings import settings
 from shared.middleware.auth import get_current_user, require_admin
 from shared.models.models import (
     Booking,
     BookingStatus,
+    NotificationType,
+    PanditProfile,
     Payment,
     PaymentStatus,
     User,
@@ -30,17 +33,22 @@ from shared.schemas.schemas import (
     PaymentResponse,
     PaymentVerifyRequest,
 )
+from shared.utils.notifications import create_notification
+from shared.utils.pagination import decode_cursor, encode_cursor
+from shared.utils.security import verify_razorpay_signature, verify_razorpay_webhook_signature
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
+_PAYMENT_RESPONSE_COLUMNS = tuple(
+    col for col in Payment.__table__.columns if col.name in PaymentResponse.model_fields
+)
+_PAYMENT_LIST = TypeAdapter(list[PaymentResponse])
+
 
 def get_razorpay_client():
-    """Lazy import Razorpay client."""
+    """Shared Razorpay client; 503 if the SDK isn't installed."""
     try:
-        import razorpay
-        return razorpay.Client(
-            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-        )
+        return razorpay_client.get_razorpay_client()
     except ImportError:
         raise HTTPException(status_code=503, detail="Payment service unavailable")
 
@@ -57,14 +65,16 @@ async def initiate_payment(
     Create Razorpay order for a booking.
     Client uses order_id + key_id to open Razorpay checkout.
     """
-    # Fetch booking
+    # Booking and any earlier Payment (1-to-1) in one round-trip
     result = await db.execute(
-        select(Booking).where(
+        select(Booking, Payment)
+        .outerjoin(Payment, Payment.booking_id == Booking.id)
+        .where(
             Booking.id == data.booking_id,
             Booking.user_id == current_user.id,
         )
     )
-    booking = result.scalar_one_or_none()
+    booking, existing = result.first() or (None, None)
 
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
@@ -75,11 +85,6 @@ async def initiate_payment(
             detail=f"Cannot initiate payment for booking in '{booking.status.value}' state",
         )
 
-    # Check for existing payment
-    existing_payment = await db.execute(
-        select(Payment).where(Payment.booking_id == booking.id)
-    )
-    existing = existing_payment.scalar_one_or_none()
     if existing and existing.status == PaymentStatus.CAPTURED:
         raise HTTPException(status_code=400, detail="Payment already completed")
 
@@ -140,53 +145,54 @@ async def verify_payment(
     Transitions booking: PAYMENT_PENDING → AWAITING_PANDIT.
     """
     # Verify signature
-    body = f"{data.razorpay_order_id}|{data.razorpay_payment_id}"
-    expected_signature = hmac.new(
-        settings.RAZORPAY_KEY_SECRET.encode(),
-        body.encode(),
-        hashlib.sha256,
-    ).hexdigest()
-
-    if not hmac.compare_digest(expected_signature, data.razorpay_signature):
+    if not verify_razorpay_signature(
+        data.razorpay_order_id, data.razorpay_payment_id, data.razorpay_signature
+    ):
         raise HTTPException(status_code=400, detail="Invalid payment signature")
 
     # Update payment record
-    payment_result = await db.execute(
-        select(Payment).where(
-            Payment.razorpay_order_id == data.razorpay_order_id
+    booking_id = await db.scalar(
+        update(Payment)
+        .where(Payment.razorpay_order_id == data.razorpay_order_id)
+        .values(
+            razorpay_payment_id=data.razorpay_payment_id,
+            razorpay_signature=data.razorpay_signature,
+            status=PaymentStatus.CAPTURED,
+            captured_at=datetime.now(timezone.utc),
         )
+        .returning(Payment.booking_id)
+        .execution_options(synchronize_session=False)
     )
-    payment = payment_result.scalar_one_or_none()
-    if not payment:
+    if not booking_id:
         raise HTTPException(status_code=404, detail="Payment record not found")
 
-    payment.razorpay_payment_id = data.razorpay_payment_id
-    payment.razorpay_signature = data.razorpay_signature
-    payment.status = PaymentStatus.CAPTURED
-    payment.captured_at = datetime.now(timezone.utc)
+    # Transition booking. Guarded UPDATE ... FROM pandit_profiles: only the
+    # request that moves it out of PAYMENT_PENDING gets a row back (and the
+    # pandit's user id with it), so a retried or double-clicked verify can't
+    # notify twice. The booking must be both the payment's and the one named.
+    transitioned = (await db.execute(
+        update(Booking)
+        .where(
+            Booking.id == booking_id,
+            Booking.id == data.booking_id,
+            Booking.status == BookingStatus.PAYMENT_PENDING,
+            PanditProfile.id == Booking.pandit_id,
+        )
+        .values(status=BookingStatus.AWAITING_PANDIT)
+        .returning(Booking.scheduled_at, PanditProfile.user_id)
+        .execution_options(synchronize_session=False)
+    )).first()
 
-    # Transition booking
-    booking_result = await db.execute(
-        select(Booking).where(Booking.id == data.booking_id)
-    )
-    booking = booking_result.scalar_one_or_none()
-    if booking:
-        booking.status = BookingStatus.AWAITING_PANDIT
+    if transitioned:
+        scheduled_at, pandit_user_id = transitioned
 
         # Notify pandit (in production: via Kafka event)
-        from shared.models.models import Notification, NotificationType, PanditProfile
-        pandit_result = await db.execute(
-            select(PanditProfile).where(PanditProfile.id == booking.pandit_id)
+        await create_notification(
+            db, pandit_user_id, NotificationType.BOOKING_CREATED,
+            "New Booking Request 🙏",
+            f"You have a new paid booking request for {scheduled_at.strftime('%d %b %Y')}. Please accept or decline.",
+            booking_id,
         )
-        pandit = pandit_result.scalar_one_or_none()
-        if pandit:
-            db.add(Notification(
-                user_id=pandit.user_id,
-                booking_id=booking.id,
-                type=NotificationType.BOOKING_CREATED,
-                title="New Booking Request 🙏",
-                body=f"You have a new paid booking request for {booking.scheduled_at.strftime('%d %b %Y')}. Please accept or decline.",
-            ))
 
     await db.commit()
     return MessageResponse(message="Payment verified. Pandit has been notified.")
@@ -204,17 +210,10 @@ async def razorpay_webhook(request: Request, db: AsyncSession = Depends(get_db))
     signature = request.headers.get("X-Razorpay-Signature", "")
 
     # Validate webhook signature
-    expected = hmac.new(
-        settings.RAZORPAY_WEBHOOK_SECRET.encode(),
-        body,
-        hashlib.sha256,
-    ).hexdigest()
-
-    if not hmac.compare_digest(expected, signature):
+    if not verify_razorpay_webhook_signature(body, signature):
         raise HTTPException(status_code=400, detail="Invalid webhook signature")
 
-    import json
-    payload = json.loads(body)
+    payload = orjson.loads(body)
     event = payload.get("event")
     entity = payload.get("payload", {}).get("payment", {}).get("entity", {})
 
@@ -224,38 +223,71 @@ async def razorpay_webhook(request: Request, db: AsyncSession = Depends(get_db))
     if not rzp_order_id:
         return {"status": "ignored"}
 
-    payment_result = await db.execute(
-        select(Payment).where(Payment.razorpay_order_id == rzp_order_id)
-    )
-    payment = payment_result.scalar_one_or_none()
-    if not payment:
-        return {"status": "not_found"}
-
+    # Each event is one conditional UPDATE ... RETURNING: the state check and the
+    # write are a single atomic step, so concurrent or replayed deliveries of
+    # the same event can apply it at most once.
+    now = datetime.now(timezone.utc)
     if event == "payment.captured":
-        if payment.status != PaymentStatus.CAPTURED:
-            payment.status = PaymentStatus.CAPTURED
-            payment.razorpay_payment_id = rzp_payment_id
-            payment.captured_at = datetime.now(timezone.utc)
+        applied = await db.scalar(
+            update(Payment)
+            .where(
+                Payment.razorpay_order_id == rzp_order_id,
+                Payment.status != PaymentStatus.CAPTURED,
+            )
+            .values(status=PaymentStatus.CAPTURED, razorpay_payment_id=rzp_payment_id, captured_at=now)
+            .returning(Payment.id)
+        )
 
     elif event == "payment.failed":
-        payment.status = PaymentStatus.FAILED
-
-        # Compensating transaction: release slot + cancel booking
-        booking_result = await db.execute(
-            select(Booking).where(Booking.id == payment.booking_id)
+        # Only a pending payment can fail; a late failure for an earlier attempt
+        # must not overwrite a capture
+        applied = await db.scalar(
+            update(Payment)
+            .where(
+                Payment.razorpay_order_id == rzp_order_id,
+                Payment.status == PaymentStatus.PENDING,
+            )
+            .values(status=PaymentStatus.FAILED)
+            .returning(Payment.booking_id)
         )
-        booking = booking_result.scalar_one_or_none()
-        if booking and booking.status == BookingStatus.PAYMENT_PENDING:
-            booking.status = BookingStatus.CANCELLED
-            booking.cancellation_reason = "Payment failed"
-            booking.cancelled_at = datetime.now(timezone.utc)
+        if applied:
+            # Compensating transaction: release slot + cancel booking
+            await db.execute(
+                update(Booking)
+                .where(Booking.id == applied, Booking.status == BookingStatus.PAYMENT_PENDING)
+                .values(
+                    status=BookingStatus.CANCELLED,
+                    cancellation_reason="Payment failed",
+                    cancelled_at=now,
+                )
+            )
 
     elif event == "refund.processed":
         refund_entity = payload.get("payload", {}).get("refund", {}).get("entity", {})
-        payment.status = PaymentStatus.REFUNDED
-        payment.refund_id = refund_entity.get("id")
-        payment.refund_amount = float(refund_entity.get("amount", 0)) / 100
-        payment.refunded_at = datetime.now(timezone.utc)
+        applied = await db.scalar(
+            update(Payment)
+            .where(
+                Payment.razorpay_order_id == rzp_order_id,
+                Payment.status != PaymentStatus.REFUNDED,
+            )
+            .values(
+                status=PaymentStatus.REFUNDED,
+                refund_id=refund_entity.get("id"),
+                refund_amount=float(refund_entity.get("amount", 0)) / 100,
+                refunded_at=now,
+            )
+            .returning(Payment.id)
+        )
+
+    else:
+        return {"status": "ignored"}
+
+    if not applied:
+        # Nothing matched: either an unknown order or the event was already applied
+        known = await db.scalar(
+            select(Payment.id).where(Payment.razorpay_order_id == rzp_order_id)
+        )
+        return {"status": "duplicate" if known else "not_found"}
 
     await db.commit()
     return {"status": "ok"}
@@ -306,15 +338,30 @@ async def refund_payment(
 
 @router.get("/me/history", response_model=list[PaymentResponse])
 async def my_payment_history(
+    limit: int = Query(50, ge=1, le=100),
+    cursor: str = Query(None, description="X-Next-Cursor from the previous page (keyset pagination)"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get authenticated user's payment history."""
-    result = await db.execute(
-        select(Payment)
+    """
+    Get authenticated user's payment history, newest first.
+    Pages by keyset on (created_at, id); a full page sets X-Next-Cursor.
+    Reads plain columns (served from ix_payments_user_created) — no ORM objects.
+    """
+    query = (
+        select(*_PAYMENT_RESPONSE_COLUMNS)
         .where(Payment.user_id == current_user.id)
-        .order_by(Payment.created_at.desc())
-        .limit(50)
+        .order_by(Payment.created_at.desc(), Payment.id.desc())
+        .limit(limit)
     )
-    payments = result.scalars().all()
-    return [PaymentResponse.model_validate(p) for p in payments]
+    if cursor:
+        cursor_ts, cursor_id = decode_cursor(cursor)
+        query = query.where(tuple_(Payment.created_at, Payment.id) < (cursor_ts, cursor_id))
+
+    rows = (await db.execute(query)).all()
+    headers = {}
+    if len(rows) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    # Validate + serialize the page in one adapter call; FastAPI skips its own pass
+    payments = _PAYMENT_LIST.validate_python(rows, from_attributes=True)
+    return Response(content=_PAYMENT_LIST.dump_json(payments), media_type="application/json", headers=headers)
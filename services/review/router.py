@@ -5,8 +5,9 @@ Rating and review management.
 
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func, select, update
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import Numeric, cast, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config.database import get_db
@@ -16,6 +17,30 @@ from shared.schemas.schemas import MessageResponse, ReviewCreateRequest, ReviewR
 
 router = APIRouter(prefix="/reviews", tags=["Reviews"])
 
+_REVIEW_LIST = TypeAdapter(list[ReviewResponse])
+
+
+async def _apply_rating(db: AsyncSession, pandit_id: UUID, rating_delta: int, count_delta: int) -> None:
+    """
+    Adjust the denormalized rating by one review in O(1): bump the running sum
+    and count, and derive rating_avg from them. SET expressions read the row's
+    pre-update values, so every term adds the deltas.
+    """
+    new_sum = PanditProfile.rating_sum + rating_delta
+    new_count = PanditProfile.rating_count + count_delta
+    await db.execute(
+        update(PanditProfile)
+        .where(PanditProfile.id == pandit_id)
+        .values(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating_avg=func.coalesce(
+                func.round(cast(new_sum, Numeric) / func.nullif(new_count, 0), 2), 0
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
 
 @router.post("", response_model=ReviewResponse, status_code=status.HTTP_201_CREATED)
 async def create_review(
@@ -54,18 +79,8 @@ async def create_review(
     db.add(review)
     await db.flush()
 
-    # Recalculate and denormalize aggregate rating on PanditProfile
-    avg_result = await db.execute(
-        select(func.avg(Review.rating), func.count(Review.id))
-        .where(Review.pandit_id == booking.pandit_id, Review.is_visible == True)
-    )
-    avg, count = avg_result.one()
-
-    await db.execute(
-        update(PanditProfile)
-        .where(PanditProfile.id == booking.pandit_id)
-        .values(rating_avg=round(float(avg or 0), 2), rating_count=count)
-    )
+    # Fold the new rating into the denormalized aggregate on PanditProfile
+    await _apply_rating(db, booking.pandit_id, data.rating, 1)
 
     await db.commit()
 
@@ -99,27 +114,49 @@ async def delete_review(
     db: AsyncSession = Depends(get_db),
 ):
     """Admin: soft-delete a review (hides from public without removing from DB)."""
-    result = await db.execute(select(Review).where(Review.id == review_id))
-    review = result.scalar_one_or_none()
-    if not review:
+    # Only the call that actually hides it gets a row back, so the rating
+    # aggregate is adjusted exactly once even if the request is repeated
+    hidden = (await db.execute(
+        update(Review)
+        .where(Review.id == review_id, Review.is_visible == True)
+        .values(is_visible=False)
+        .returning(Review.pandit_id, Review.rating)
+        .execution_options(synchronize_session=False)
+    )).first()
+
+    if hidden:
+        # Take the hidden review out of the rating
+        await _apply_rating(db, hidden.pandit_id, -hidden.rating, -1)
+    elif not await db.scalar(select(Review.id).where(Review.id == review_id)):
         raise HTTPException(status_code=404, detail="Review not found")
 
-    review.is_visible = False
+    await db.commit()
+    return MessageResponse(message="Review hidden successfully")
 
-    # Recalculate rating excluding hidden review
-    avg_result = await db.execute(
-        select(func.avg(Review.rating), func.count(Review.id))
-        .where(Review.pandit_id == review.pandit_id, Review.is_visible == True)
-    )
-    avg, count = avg_result.one()
-    await db.execute(
-        update(PanditProfile)
-        .where(PanditProfile.id == review.pandit_id)
-        .values(rating_avg=round(float(avg or 0), 2), rating_count=count)
-    )
+
+@router.post("/{review_id}/restore", response_model=MessageResponse)
+async def restore_review(
+    review_id: UUID,
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Admin: un-hide a soft-deleted review and fold it back into the rating."""
+    # Mirror of delete_review: only the call that flips it back counts it
+    restored = (await db.execute(
+        update(Review)
+        .where(Review.id == review_id, Review.is_visible == False)
+        .values(is_visible=True)
+        .returning(Review.pandit_id, Review.rating)
+        .execution_options(synchronize_session=False)
+    )).first()
+
+    if restored:
+        await _apply_rating(db, restored.pandit_id, restored.rating, 1)
+    elif not await db.scalar(select(Review.id).where(Review.id == review_id)):
+        raise HTTPException(status_code=404, detail="Review not found")
 
     await db.commit()
-    return MessageResponse(message="Review hidden successfully")
+    return MessageResponse(message="Review restored successfully")
 
 
 @router.get("/pandit/{pandit_id}", response_model=list[ReviewResponse])
@@ -137,4 +174,6 @@ async def get_pandit_reviews(
         .offset((page - 1) * page_size)
         .limit(page_size)
     )
-    return [ReviewResponse.model_validate(r) for r in result.scalars()]
+    # One adapter call validates and serializes the whole page; FastAPI skips its own pass
+    reviews = _REVIEW_LIST.validate_python(result.scalars().all(), from_attributes=True)
+    return Response(content=_REVIEW_LIST.dump_json(reviews), media_type="application/json")
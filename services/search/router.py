@@ -19,26 +19,37 @@ from config.redis_client import RedisCache, get_redis
 from config.settings import settings
 from shared.models.models import PanditProfile, Pooja, User, VerificationStatus
 from shared.schemas.schemas import PanditProfileResponse, PanditSearchResponse
+from shared.utils.dates import day_bounds
 
 router = APIRouter(prefix="/search", tags=["Search"])
 
 
 # ── Elasticsearch Client ──────────────────────────────────────
 
+# Built once at import so every request shares one connection pool
+# (previously a new client — and pool — was created per search and never closed).
+try:
+    from elasticsearch import AsyncElasticsearch
+    _es_client = AsyncElasticsearch(
+        settings.ELASTICSEARCH_URL,
+        basic_auth=(
+            settings.ELASTICSEARCH_USERNAME or "elastic",
+            settings.ELASTICSEARCH_PASSWORD or "",
+        ) if settings.ELASTICSEARCH_PASSWORD else None,
+    )
+except Exception:
+    _es_client = None
+
+
 async def get_es_client():
-    """Lazy Elasticsearch client. Returns None if not configured."""
-    try:
-        from elasticsearch import AsyncElasticsearch
-        client = AsyncElasticsearch(
-            settings.ELASTICSEARCH_URL,
-            basic_auth=(
-                settings.ELASTICSEARCH_USERNAME or "elastic",
-                settings.ELASTICSEARCH_PASSWORD or "",
-            ) if settings.ELASTICSEARCH_PASSWORD else None,
-        )
-        return client
-    except Exception:
-        return None
+    """Shared Elasticsearch client. Returns None if not configured."""
+    return _es_client
+
+
+async def close_es_client() -> None:
+    """Close the shared Elasticsearch client. Run during app shutdown."""
+    if _es_client:
+        await _es_client.close()
 
 
 # ── Elasticsearch Index Mapping ───────────────────────────────
@@ -344,20 +355,21 @@ async def _search_postgis(
     # Apply availability filter
     if available_date:
         from shared.models.models import PanditAvailability
-        from datetime import datetime as dt
         try:
-            target = dt.strptime(available_date, "%Y-%m-%d")
+            day_start, day_end = day_bounds(available_date)
+        except ValueError:
+            day_start = None
+        if day_start is not None:
             query = query.where(
                 PanditProfile.id.in_(
                     select(PanditAvailability.pandit_id).where(
-                        func.date(PanditAvailability.date) == target.date(),
+                        PanditAvailability.date >= day_start,
+                        PanditAvailability.date < day_end,
                         PanditAvailability.is_booked == False,
                         PanditAvailability.is_blocked == False,
                     )
                 )
             )
-        except ValueError:
-            pass
 
     # Count total
     count_query = select(func.count()).select_from(query.subquery())
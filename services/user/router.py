@@ -6,11 +6,17 @@ User profile management, saved pandits, and address book.
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config.database import get_db
-from shared.middleware.auth import get_current_user
+from config.redis_client import get_redis
+from shared.middleware.auth import (
+    get_current_user,
+    get_current_user_response,
+    invalidate_user_response,
+)
 from shared.models.models import PanditProfile, SavedPandit, User, UserAddress
 from shared.schemas.schemas import (
     MessageResponse,
@@ -24,9 +30,9 @@ router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(user_payload: dict = Depends(get_current_user_response)):
     """Return the currently authenticated user's profile."""
-    return UserResponse.model_validate(current_user)
+    return ORJSONResponse(user_payload)
 
 
 @router.put("/me", response_model=UserResponse)
@@ -34,6 +40,7 @@ async def update_me(
     data: UserUpdateRequest,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
+    redis=Depends(get_redis),
 ):
     """
     Update user profile fields (name, phone, preferred_language, fcm_token).
@@ -56,6 +63,7 @@ async def update_me(
 
     await db.commit()
     await db.refresh(current_user)
+    await invalidate_user_response(redis, current_user.id)
     return UserResponse.model_validate(current_user)
 
 
@@ -5,6 +5,7 @@ JWT is validated here. Downstream services trust X-User-* headers.
 """
 
 from typing import Optional
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError
@@ -12,9 +13,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from config.database import get_db
-from config.redis_client import get_redis
-from shared.models.models import User, UserRole
-from shared.utils.security import verify_access_token
+from config.redis_client import RedisCache, get_redis
+from shared.models.models import PanditProfile, User, UserRole
+from shared.schemas.schemas import UserResponse
+from shared.utils.security import verify_access_token_cached
 
 security = HTTPBearer(auto_error=False)
 
@@ -43,7 +45,7 @@ async def get_token_data(
         )
 
     try:
-        payload = verify_access_token(credentials.credentials)
+        payload = verify_access_token_cached(credentials.credentials)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -83,6 +85,36 @@ async def get_current_user(
     return user
 
 
+# Serialized `/me` payload per user id, tagged with the user's version key in
+# Redis. Entries are per-worker; bumping the version (invalidate_user_response)
+# stales them on every worker at once, so a suspension applies immediately.
+_user_response_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+
+
+async def get_current_user_response(
+    token_data: TokenData = Depends(get_token_data),
+    db: AsyncSession = Depends(get_db),
+    redis=Depends(get_redis),
+) -> dict:
+    """Current user as a JSON-ready UserResponse dict; skips the DB load and validation on a cache hit."""
+    # Read the version before loading: a bump racing the load leaves this
+    # entry tagged with the old version, so the next request reloads
+    version = await RedisCache(redis).get_user_version(token_data.user_id)
+    cached = _user_response_cache.get(token_data.user_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    user = await get_current_user(token_data, db)
+    payload = UserResponse.model_validate(user).model_dump(mode="json")
+    _user_response_cache[token_data.user_id] = (version, payload)
+    return payload
+
+
+async def invalidate_user_response(redis, user_id) -> None:
+    """Drop the user's cached `/me` payload on every worker. Call after commit."""
+    _user_response_cache.pop(str(user_id), None)
+    await RedisCache(redis).bump_user_version(str(user_id))
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -113,6 +145,41 @@ require_pandit = RoleRequired(UserRole.PANDIT, UserRole.ADMIN)
 require_admin = RoleRequired(UserRole.ADMIN)
 
 
+async def get_current_pandit(
+    token_data: TokenData = Depends(get_token_data),
+    db: AsyncSession = Depends(get_db),
+) -> PanditProfile:
+    """
+    The caller's PanditProfile, for /pandits/me/* endpoints. Loads the user and
+    profile in one joined query and applies the same checks as require_pandit.
+    """
+    result = await db.execute(
+        select(User, PanditProfile)
+        .outerjoin(PanditProfile, PanditProfile.user_id == User.id)
+        .where(User.id == token_data.user_id)
+    )
+    user, pandit = result.first() or (None, None)
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+        )
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is inactive",
+        )
+    if user.role not in require_pandit.roles:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Required role: {[r.value for r in require_pandit.roles]}",
+        )
+    if not pandit:
+        raise HTTPException(status_code=404, detail="Pandit profile not found")
+    return pandit
+
+
 async def get_optional_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: AsyncSession = Depends(get_db),
@@ -122,7 +189,7 @@ async def get_optional_user(
     if not credentials:
         return None
     try:
-        payload = verify_access_token(credentials.credentials)
+        payload = verify_access_token_cached(credentials.credentials)
         jti = payload.get("jti")
         if jti and await redis.exists(f"jwt_revoked:{jti}"):
             return None
@@ -0,0 +1,123 @@
+"""
+shared/middleware/core.py
+Pure ASGI middleware for request ID, process time, and rate limiting.
+One class instead of three stacked @app.middleware("http") handlers, so each
+request pays for a single wrapper — no BaseHTTPMiddleware task + stream.
+Also a fast-path dispatcher that lets probe endpoints skip the whole stack.
+"""
+
+import time
+import uuid
+
+from jose import JWTError
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import config.redis_client as redis_state
+from config.settings import settings
+from shared.utils.security import verify_access_token_cached
+
+RATE_LIMIT_SKIP_PATHS = frozenset(
+    {"/health", "/payments/webhook", "/docs", "/redoc", "/openapi.json"}
+)
+_RATE_LIMIT_AUTH = settings.RATE_LIMIT_PER_MINUTE
+_RATE_LIMIT_UNAUTH = settings.RATE_LIMIT_UNAUTH_PER_MINUTE
+
+
+class CoreMiddleware:
+    """
+    - Adds unique X-Request-ID to every request for distributed tracing
+    - Tracks and exposes request processing time (X-Process-Time)
+    - Token-bucket rate limiter. In production, use Kong rate limiting plugin.
+      Skips rate limiting for health checks and webhook endpoints.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+
+        # Single pass over the raw (bytes, bytes) header list — names are lowercase
+        request_id = auth_header = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+            elif name == b"authorization":
+                auth_header = value.decode("latin-1")
+        request_id = request_id or str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
+        raw_request_id = request_id.encode("latin-1")
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                process_time = round((time.perf_counter() - start) * 1000, 2)
+                message.setdefault("headers", [])
+                message["headers"].append((b"x-request-id", raw_request_id))
+                message["headers"].append((b"x-process-time", f"{process_time}ms".encode()))
+            await send(message)
+
+        if scope["path"] not in RATE_LIMIT_SKIP_PATHS and await self._is_rate_limited(scope, auth_header):
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Rate limit exceeded. Please slow down."},
+                headers={"Retry-After": "60"},
+            )
+            await response(scope, receive, send_with_headers)
+            return
+
+        await self.app(scope, receive, send_with_headers)
+
+    @staticmethod
+    async def _is_rate_limited(scope: Scope, auth_header: str | None) -> bool:
+        script = redis_state.rate_limit_script
+        if not redis_state.redis_client or not script:
+            return False
+
+        try:
+            # Authenticated requests bucket on the verified subject, so a user
+            # can't mint fresh buckets by sending junk or rotated tokens. The
+            # verify is memoized per token, so this is usually a dict hit.
+            key = None
+            if auth_header and auth_header.startswith("Bearer "):
+                try:
+                    payload = verify_access_token_cached(auth_header[7:])
+                    key = f"ratelimit:user:{payload['sub']}"
+                    limit = _RATE_LIMIT_AUTH
+                except (JWTError, KeyError):
+                    pass  # Invalid or expired token: treat as anonymous
+            if key is None:
+                client = scope.get("client")
+                client_ip = client[0] if client else "unknown"
+                key = f"ratelimit:unauth:{client_ip}"
+                limit = _RATE_LIMIT_UNAUTH
+
+            # Token bucket refill + take in one atomic round-trip (EVALSHA)
+            allowed = await script(keys=[key], args=[limit, 60_000])
+            return allowed == 0
+        except Exception:
+            return False  # Don't fail requests if Redis is down
+
+
+class FastPathMiddleware:
+    """
+    Outermost middleware: serves exact-match paths (e.g. /health) straight from
+    a bare ASGI handler, bypassing every other middleware and the router.
+    Meant for load-balancer / k8s probes that need none of CORS, GZip, sessions.
+    """
+
+    def __init__(self, app: ASGIApp, routes: dict[str, ASGIApp]):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            handler = self.routes.get(scope["path"])
+            if handler is not None:
+                await handler(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
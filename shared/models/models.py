@@ -12,6 +12,7 @@ from typing import List, Optional
 
 from geoalchemy2 import Geography
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     CheckConstraint,
     Column,
@@ -26,6 +27,7 @@ from sqlalchemy import (
     Text,
     UniqueConstraint,
     func,
+    text,
 )
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -282,6 +284,7 @@ class PanditProfile(TimestampMixin, Base):
     # Rating (denormalized for query performance)
     rating_avg: Mapped[Decimal] = mapped_column(Numeric(3, 2), default=0.00)
     rating_count: Mapped[int] = mapped_column(Integer, default=0)
+    rating_sum: Mapped[int] = mapped_column(BigInteger, default=0, server_default=text("0"))  # running total behind rating_avg
 
     # Verification
     verification_status: Mapped[VerificationStatus] = mapped_column(
@@ -345,8 +348,15 @@ class PanditAvailability(Base):
     pandit: Mapped["PanditProfile"] = relationship(back_populates="availability_slots")
 
     __table_args__ = (
+        # Slot dates are stored at UTC midnight, so this is one slot per day + start
+        UniqueConstraint("pandit_id", "date", "start_time", name="uq_availability_pandit_date_start"),
         Index("ix_availability_pandit_date", "pandit_id", "date"),
         Index("ix_availability_date", "date"),
+        # Free-slot lookups (booking create/accept) — only unbooked, unblocked rows
+        Index(
+            "ix_availability_pandit_date_free", "pandit_id", "date",
+            postgresql_where=text("NOT is_booked AND NOT is_blocked"),
+        ),
     )
 
 
@@ -418,6 +428,7 @@ class Booking(TimestampMixin, Base):
         Index("ix_bookings_pandit_id", "pandit_id"),
         Index("ix_bookings_status", "status"),
         Index("ix_bookings_scheduled_at", "scheduled_at"),
+        Index("ix_bookings_created_at_id", "created_at", "id"),  # admin keyset pagination
     )
 
 
@@ -437,7 +448,8 @@ class BookingAuditLog(Base):
         UUID(as_uuid=True), ForeignKey("users.id"), nullable=True
     )
     reason: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    metadata: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    # `metadata` is reserved on declarative classes; the column keeps its name
+    metadata_: Mapped[Optional[dict]] = mapped_column("metadata", JSONB, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
@@ -489,6 +501,14 @@ class Payment(TimestampMixin, Base):
     __table_args__ = (
         Index("ix_payments_razorpay_order", "razorpay_order_id"),
         Index("ix_payments_razorpay_payment", "razorpay_payment_id"),
+        # Covering index for the user's history page (index-only scans)
+        Index(
+            "ix_payments_user_created",
+            "user_id",
+            "created_at",
+            "id",
+            postgresql_include=["booking_id", "amount", "status", "razorpay_payment_id", "captured_at"],
+        ),
     )
 
 
@@ -550,7 +570,11 @@ class Notification(TimestampMixin, Base):
     user: Mapped["User"] = relationship(back_populates="notifications")
     booking: Mapped[Optional["Booking"]] = relationship(back_populates="notifications")
 
-    __table_args__ = (Index("ix_notifications_user_id_read", "user_id", "is_read"),)
+    __table_args__ = (
+        Index("ix_notifications_user_id_read", "user_id", "is_read"),
+        # Keyset pagination: newest-first per user, scanned backwards
+        Index("ix_notifications_user_created", "user_id", "created_at", "id"),
+    )
 
 
 class SavedPandit(TimestampMixin, Base):
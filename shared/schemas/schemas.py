@@ -42,6 +42,10 @@ class AuthCallbackResponse(BaseSchema):
     user: "UserResponse"
 
 
+class RefreshTokenRequest(BaseSchema):
+    refresh_token: Optional[str] = None
+
+
 # ── User ──────────────────────────────────────────────────────
 
 class UserResponse(BaseSchema):
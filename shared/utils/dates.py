@@ -0,0 +1,16 @@
+"""
+shared/utils/dates.py
+Date helpers shared by the routers that filter availability by day.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+
+
+def day_bounds(day: str) -> tuple[datetime, datetime]:
+    """
+    UTC [start, end) for a YYYY-MM-DD string; raises ValueError on bad input.
+    Filtering on a range instead of func.date(...) lets Postgres use the
+    (pandit_id, date) index. Slot dates are stored at the start of their day.
+    """
+    start = datetime.combine(date.fromisoformat(day), time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
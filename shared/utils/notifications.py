@@ -0,0 +1,80 @@
+"""
+shared/utils/notifications.py
+In-app notification writes shared by every API path that creates them.
+"""
+
+import random
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID, uuid4
+
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import config.redis_client as redis_state
+from config.database import run_after_commit, run_after_rollback
+from config.redis_client import RedisCache
+from shared.models.models import Notification, NotificationType
+
+# Duplicate window per type, in seconds. Payment events are replayed by
+# webhooks/verify retries over a longer span than booking transitions. TTLs
+# are jittered so keys from one burst don't all expire together.
+_DEDUP_TTL = {NotificationType.PAYMENT_SUCCESS: 300, NotificationType.PAYMENT_FAILED: 300}
+_DEDUP_TTL_DEFAULT = 60
+_DEDUP_JITTER = 10
+
+
+async def create_notification(
+    db: AsyncSession,
+    user_id: UUID | str,
+    notification_type: NotificationType,
+    title: str,
+    body: str,
+    booking_id: UUID | str | None = None,
+    dedup: bool = True,
+) -> Optional[UUID]:
+    """
+    Add an in-app notification to the caller's transaction. Once it commits,
+    the user's cached unread count is dropped and the notification is
+    published to their open /notifications/ws sockets.
+
+    With `dedup`, a repeat of the same (user, type, booking) event inside its
+    window is dropped and None is returned. The claim is given back if the
+    transaction rolls back, so a retry isn't mistaken for a duplicate.
+    """
+    uid = str(user_id)
+    cache = RedisCache(redis_state.redis_client)
+    if dedup:
+        key_args = (uid, notification_type.value, str(booking_id) if booking_id else None)
+        ttl = _DEDUP_TTL.get(notification_type, _DEDUP_TTL_DEFAULT) + random.randint(0, _DEDUP_JITTER)
+        if not await cache.claim_notification(*key_args, ttl):
+            return None
+        run_after_rollback(db, lambda: cache.release_notification(*key_args))
+
+    notification_id = uuid4()
+    db.add(Notification(
+        id=notification_id,
+        user_id=user_id,
+        booking_id=booking_id,
+        type=notification_type,
+        title=title,
+        body=body,
+    ))
+    # NotificationResponse-shaped, as the socket clients expect
+    payload = orjson.dumps({
+        "id": notification_id,
+        "type": notification_type.value,
+        "title": title,
+        "body": body,
+        "is_read": False,
+        "read_at": None,
+        "created_at": datetime.now(timezone.utc),
+        "booking_id": booking_id,
+    })
+
+    async def _after_commit():
+        await cache.invalidate_unread_count(uid)
+        await cache.publish_notification(uid, payload)
+
+    run_after_commit(db, _after_commit)
+    return notification_id
@@ -0,0 +1,51 @@
+"""
+shared/utils/pagination.py
+Offset and keyset (cursor) pagination helpers shared by list endpoints.
+"""
+
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def pages(total: int | None, size: int) -> int:
+    """Ceiling division for page counts; 0 for an empty result."""
+    return 0 if not total else (total + size - 1) // size
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    """Opaque keyset cursor: base64url of 'created_at|id'."""
+    return urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        created_at, row_id = urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def paginate(db: AsyncSession, query, page: int, page_size: int) -> tuple[list, int]:
+    """
+    Fetch one page plus the filtered total in a single round-trip.
+    COUNT(*) OVER () is evaluated over the full filtered result before
+    OFFSET/LIMIT, so every returned row carries the total.
+    """
+    result = await db.execute(
+        query.add_columns(func.count().over().label("total_count"))
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )
+    rows = result.all()
+    if rows:
+        return rows, rows[0].total_count
+    if page == 1:
+        return rows, 0
+    # Past the last page there are no rows to carry the count
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    return rows, total or 0
@@ -4,11 +4,14 @@ JWT creation/verification, password hashing, and security helpers.
 """
 
 import hashlib
+import hmac
 import secrets
+import time
 import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
+from cachetools import TTLCache
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
@@ -18,6 +21,7 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 # ── JWT ───────────────────────────────────────────────────────
+_ACCESS_TTL = timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
 
 def create_access_token(
     user_id: str,
@@ -31,7 +35,7 @@ def create_access_token(
     """
     jti = str(uuid.uuid4())
     now = datetime.now(timezone.utc)
-    expire = now + timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
+    expire = now + _ACCESS_TTL
 
     payload = {
         "sub": str(user_id),
@@ -59,10 +63,29 @@ def create_refresh_token() -> tuple[str, str]:
 
 
 def hash_token(token: str) -> str:
-    """SHA-256 hash for securely storing refresh tokens."""
+    """
+    128-bit BLAKE2b hex digest for securely storing refresh tokens.
+    32 hex chars rather than SHA-256's 64 halves the unique index; the tokens
+    carry 512 bits of entropy, so 128 bits of digest is ample.
+    """
+    return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
+
+def legacy_hash_token(token: str) -> str:
+    """
+    SHA-256 hex digest, as refresh tokens issued before the BLAKE2b switch were
+    stored. Lookups match either so those sessions keep working; rotation
+    rewrites them under hash_token. Remove once JWT_REFRESH_TOKEN_EXPIRE_DAYS
+    have passed since the switch was deployed — every legacy row has expired.
+    """
     return hashlib.sha256(token.encode()).hexdigest()
 
 
+def refresh_token_hashes(token: str) -> list[str]:
+    """Every stored form `token` may have, for lookups during the hash migration."""
+    return [hash_token(token), legacy_hash_token(token)]
+
+
 def verify_access_token(token: str) -> dict:
     """
     Decode and verify a JWT access token.
@@ -81,6 +104,22 @@ def verify_access_token(token: str) -> dict:
         raise
 
 
+# Verified-payload cache: a token seen in the last 30s skips signature
+# verification and claim parsing. Revocation is still checked in Redis on
+# every request, so logout takes effect immediately on all workers.
+_access_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+
+
+def verify_access_token_cached(token: str) -> dict:
+    """verify_access_token() memoized per token; never returns an expired payload."""
+    payload = _access_token_cache.get(token)
+    if payload is not None and payload["exp"] > time.time():
+        return payload
+    payload = verify_access_token(token)
+    _access_token_cache[token] = payload
+    return payload
+
+
 def get_token_remaining_ttl(payload: dict) -> int:
     """Returns seconds until token expiry. Used for JWT deny-list TTL."""
     exp = payload.get("exp", 0)
@@ -99,29 +138,41 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 
 # ── Razorpay Webhook Signature ────────────────────────────────
+# Secrets encoded once at import, not on every callback
+_RAZORPAY_KEY_SECRET = settings.RAZORPAY_KEY_SECRET.encode()
+_RAZORPAY_WEBHOOK_SECRET = settings.RAZORPAY_WEBHOOK_SECRET.encode()
+
+
+def _hmac_sha256(key: bytes, msg: bytes) -> str:
+    """
+    Hex HMAC-SHA256 via hmac.digest(), OpenSSL's one-shot HMAC: no Python-level
+    HMAC object, and SHA-NI is used wherever the CPU and OpenSSL support it.
+    """
+    return hmac.digest(key, msg, "sha256").hex()
+
+
+# Hex SHA-256 length. Anything else can't match, so it's rejected before any
+# hashing — malformed signatures can't force an HMAC each. The length is
+# public, so this early exit leaks nothing.
+_SIGNATURE_HEX_LEN = 64
+
 
 def verify_razorpay_signature(
     order_id: str,
     payment_id: str,
     signature: str,
+    key_secret: Optional[str] = None,
 ) -> bool:
-    """Verify Razorpay payment signature using HMAC-SHA256."""
-    import hmac
-    body = f"{order_id}|{payment_id}"
-    expected = hmac.new(
-        settings.RAZORPAY_WEBHOOK_SECRET.encode(),
-        body.encode(),
-        hashlib.sha256,
-    ).hexdigest()
+    """Verify Razorpay checkout signature (HMAC-SHA256 of 'order_id|payment_id' with the key secret)."""
+    if len(signature) != _SIGNATURE_HEX_LEN:
+        return False
+    key = key_secret.encode() if key_secret else _RAZORPAY_KEY_SECRET
+    expected = _hmac_sha256(key, f"{order_id}|{payment_id}".encode())
     return hmac.compare_digest(expected, signature)
 
 
 def verify_razorpay_webhook_signature(payload_body: bytes, signature: str) -> bool:
-    """Verify Razorpay webhook body signature."""
-    import hmac
-    expected = hmac.new(
-        settings.RAZORPAY_WEBHOOK_SECRET.encode(),
-        payload_body,
-        hashlib.sha256,
-    ).hexdigest()
-    return hmac.compare_digest(expected, signature)
+    """Verify Razorpay webhook body signature; the body is the raw request bytes."""
+    if len(signature) != _SIGNATURE_HEX_LEN:
+        return False
+    return hmac.compare_digest(_hmac_sha256(_RAZORPAY_WEBHOOK_SECRET, payload_body), signature)
@@ -5,12 +5,21 @@ Celery application instance — shared across all task modules.
 Workers are started with:
     celery -A tasks.celery_app worker --loglevel=info --concurrency=4
 
+Channel delivery is short, I/O-bound work. Each channel has its own queue so
+one slow provider never blocks the others, and each pool is sized separately.
+Keep them on prefork: the channel tasks' time limits are only enforced there.
+    celery -A tasks.celery_app worker -Q push --pool=prefork --concurrency=16
+    celery -A tasks.celery_app worker -Q sms --pool=prefork --concurrency=8
+    celery -A tasks.celery_app worker -Q email --pool=prefork --concurrency=16
+    celery -A tasks.celery_app worker -Q notifications --concurrency=16 --prefetch-multiplier=16
+
 Beat scheduler (periodic tasks):
     celery -A tasks.celery_app beat --loglevel=info
 """
 
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init
 
 from config.settings import settings
 
@@ -54,6 +63,11 @@ celery_app.conf.update(
 
     # Routing: separate queues for different priority levels
     task_routes={
+        # Per-channel queues first — routes match in order
+        "tasks.notification_tasks.send_push_notification": {"queue": "push"},
+        "tasks.notification_tasks.send_push_batch": {"queue": "push"},
+        "tasks.notification_tasks.send_sms": {"queue": "sms"},
+        "tasks.notification_tasks.send_email": {"queue": "email"},
         "tasks.notification_tasks.*": {"queue": "notifications"},
         "tasks.payment_tasks.process_payout": {"queue": "payments"},
         "tasks.payment_tasks.release_expired_slot_locks": {"queue": "default"},
@@ -61,8 +75,21 @@ celery_app.conf.update(
 
     # Worker prefetch: 1 task at a time for long-running tasks
     worker_prefetch_multiplier=1,
+
+    # Redis broker priorities (0 = served first): dispatch_notification sends
+    # PAYMENT_SUCCESS at 0 and everything else at 5 on the same channel queue
+    broker_transport_options={"queue_order_strategy": "priority"},
 )
 
+
+@worker_process_init.connect
+def _init_worker_clients(**_):
+    """Build provider clients in each pool process before it takes tasks, not on the first send."""
+    from config.notification_clients import init_notification_clients
+
+    init_notification_clients()
+
+
 # ── Periodic Tasks (Beat Schedule) ────────────────────────────────────────────
 
 celery_app.conf.beat_schedule = {
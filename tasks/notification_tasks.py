@@ -16,64 +16,106 @@ from datetime import datetime, timedelta, timezone
 from celery import Task
 from sqlalchemy import select, update
 
+from config.notification_clients import (
+    PROVIDER_TIMEOUT,
+    get_firebase_app,
+    get_resend,
+    get_twilio_client,
+)
 from config.settings import settings
 from tasks.celery_app import celery_app
 
 logger = logging.getLogger(__name__)
 
+# Single-send channel tasks: the soft limit lands inside the sender's except
+# (logged, then retried) once a call outlives the client's own timeout. It is
+# the only deadline on Resend, whose SDK has no timeout setting. Needs a pool
+# that enforces time limits (prefork, not threads).
+_SEND_LIMITS = {"soft_time_limit": PROVIDER_TIMEOUT + 5, "time_limit": PROVIDER_TIMEOUT + 15}
+
 
 # ── Base Task with DB session ──────────────────────────────────────────────────
 
 class DatabaseTask(Task):
     """Base class that provides a synchronous DB session for tasks."""
     abstract = True
-    _session = None
+    # One engine + sessionmaker per worker process, built on first use (after
+    # the prefork fork, so no pooled connection is shared across processes)
+    _sessionmaker = None
 
     def get_session(self):
         """Get a synchronous SQLAlchemy session (Celery runs sync by default)."""
-        from sqlalchemy import create_engine
-        from sqlalchemy.orm import sessionmaker
-        from config.settings import settings
+        if DatabaseTask._sessionmaker is None:
+            from sqlalchemy import create_engine
+            from sqlalchemy.orm import sessionmaker
 
-        # Convert async URL (postgresql+asyncpg://) to sync (postgresql+psycopg2://)
-        sync_url = settings.DATABASE_URL.replace("+asyncpg", "+psycopg2")
-        engine = create_engine(sync_url, pool_pre_ping=True)
-        Session = sessionmaker(bind=engine)
-        return Session()
+            # Convert async URL (postgresql+asyncpg://) to sync (postgresql+psycopg2://)
+            sync_url = settings.DATABASE_URL.replace("+asyncpg", "+psycopg2")
+            engine = create_engine(sync_url, pool_pre_ping=True, pool_size=5)
+            DatabaseTask._sessionmaker = sessionmaker(bind=engine)
+        return DatabaseTask._sessionmaker()
 
 
 # ── Core Delivery Functions ────────────────────────────────────────────────────
 
+def _fcm_message(fcm_token: str, title: str, body: str, data: dict = None):
+    from firebase_admin import messaging
+
+    return messaging.Message(
+        notification=messaging.Notification(title=title, body=body),
+        data={k: str(v) for k, v in (data or {}).items()},
+        token=fcm_token,
+        android=messaging.AndroidConfig(priority="high"),
+        apns=messaging.APNSConfig(
+            payload=messaging.APNSPayload(
+                aps=messaging.Aps(badge=1, sound="default")
+            )
+        ),
+    )
+
+
 def _send_fcm(fcm_token: str, title: str, body: str, data: dict = None) -> bool:
     """Send FCM push notification. Returns True on success."""
     try:
-        import firebase_admin
         from firebase_admin import messaging
 
-        message = messaging.Message(
-            notification=messaging.Notification(title=title, body=body),
-            data={k: str(v) for k, v in (data or {}).items()},
-            token=fcm_token,
-            android=messaging.AndroidConfig(priority="high"),
-            apns=messaging.APNSConfig(
-                payload=messaging.APNSPayload(
-                    aps=messaging.Aps(badge=1, sound="default")
-                )
-            ),
-        )
-        messaging.send(message)
+        messaging.send(_fcm_message(fcm_token, title, body, data), app=get_firebase_app())
         return True
     except Exception as e:
         logger.warning(f"FCM send failed: {e}")
         return False
 
 
+FCM_BATCH_SIZE = 500  # FCM's per-call message limit
+
+
+def _send_fcm_batch(pushes: list[dict]) -> int:
+    """
+    Send many pushes with messaging.send_each, in chunks of up to 500 (its
+    per-call limit). FCM v1 has no batch endpoint: send_each still makes one
+    HTTP request per message, but runs a chunk's requests concurrently on the
+    shared app session instead of one after another. Each push is a dict of
+    _fcm_message() kwargs. Per-token failures are logged; returns the number
+    delivered.
+    """
+    from firebase_admin import messaging
+
+    app = get_firebase_app()
+    delivered = 0
+    for i in range(0, len(pushes), FCM_BATCH_SIZE):
+        chunk = pushes[i:i + FCM_BATCH_SIZE]
+        response = messaging.send_each([_fcm_message(**p) for p in chunk], app=app)
+        delivered += response.success_count
+        for push, result in zip(chunk, response.responses):
+            if not result.success:
+                logger.warning(f"FCM send failed for {push['fcm_token'][:12]}…: {result.exception}")
+    return delivered
+
+
 def _send_sms(phone: str, body: str) -> bool:
     """Send SMS via Twilio. Returns True on success."""
     try:
-        from twilio.rest import Client
-        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-        client.messages.create(
+        get_twilio_client().messages.create(
             body=body,
             from_=settings.TWILIO_FROM_NUMBER,
             to=phone if phone.startswith("+") else f"+91{phone}",
@@ -87,9 +129,7 @@ def _send_sms(phone: str, body: str) -> bool:
 def _send_email(to_email: str, subject: str, html_body: str) -> bool:
     """Send transactional email via Resend. Returns True on success."""
     try:
-        import resend
-        resend.api_key = settings.RESEND_API_KEY
-        resend.Emails.send({
+        get_resend().Emails.send({
             "from": settings.EMAIL_FROM,
             "to": to_email,
             "subject": subject,
@@ -164,28 +204,65 @@ def _render(template: str, **kwargs) -> str:
 
 # ── Individual Channel Tasks ───────────────────────────────────────────────────
 
-@celery_app.task(bind=True, base=DatabaseTask, max_retries=3, default_retry_delay=60)
-def send_push_notification(self, fcm_token: str, title: str, body: str, data: dict = None):
+def _mark_sent(task: DatabaseTask, notification_id: str, channel_column: str) -> None:
+    """Record a successful channel delivery on the in-app notification row."""
+    from shared.models.models import Notification
+
+    db = task.get_session()
+    try:
+        db.execute(
+            update(Notification)
+            .where(Notification.id == notification_id)
+            .values({channel_column: True})
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True, base=DatabaseTask, max_retries=3, default_retry_delay=60, **_SEND_LIMITS)
+def send_push_notification(
+    self, fcm_token: str, title: str, body: str, data: dict = None, notification_id: str = None
+):
     """Send a single FCM push notification with retry on failure."""
     success = _send_fcm(fcm_token, title, body, data)
     if not success:
         raise self.retry(countdown=60 * (2 ** self.request.retries))
+    if notification_id:
+        _mark_sent(self, notification_id, "sent_push")
 
 
-@celery_app.task(bind=True, base=DatabaseTask, max_retries=3, default_retry_delay=120)
-def send_sms(self, phone: str, body: str):
+@celery_app.task(bind=True, base=DatabaseTask, max_retries=3, default_retry_delay=60)
+def send_push_batch(self, pushes: list[dict]):
+    """
+    Bulk FCM delivery for sweeps and broadcasts.
+    pushes: [{"fcm_token", "title", "body", "data"}, ...]
+    """
+    try:
+        delivered = _send_fcm_batch(pushes)
+        logger.info(f"send_push_batch: {delivered}/{len(pushes)} delivered")
+    except Exception as e:
+        raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
+
+
+@celery_app.task(bind=True, base=DatabaseTask, max_retries=3, default_retry_delay=120, **_SEND_LIMITS)
+def send_sms(self, phone: str, body: str, notification_id: str = None):
     """Send a single SMS via Twilio with retry on failure."""
     success = _send_sms(phone, body)
     if not success:
         raise self.retry(countdown=120 * (2 ** self.request.retries))
+    if notification_id:
+        _mark_sent(self, notification_id, "sent_sms")
 
 
-@celery_app.task(bind=True, base=DatabaseTask, max_retries=3, default_retry_delay=60)
-def send_email(self, to_email: str, subject: str, html_body: str):
+@celery_app.task(bind=True, base=DatabaseTask, max_retries=3, default_retry_delay=60, **_SEND_LIMITS)
+def send_email(self, to_email: str, subject: str, html_body: str, notification_id: str = None):
     """Send a transactional email via Resend with retry on failure."""
     success = _send_email(to_email, subject, html_body)
     if not success:
         raise self.retry(countdown=60 * (2 ** self.request.retries))
+    if notification_id:
+        _mark_sent(self, notification_id, "sent_email")
 
 
 # ── High-Level Booking Notification Tasks ─────────────────────────────────────
@@ -374,6 +451,7 @@ def send_booking_reminders():
             )
         ).scalars().all()
 
+        pushes = []
         for booking in bookings:
             user = db.execute(select(User).where(User.id == booking.user_id)).scalar_one_or_none()
             if not user:
@@ -392,11 +470,17 @@ def send_booking_reminders():
             ))
 
             if user.fcm_token:
-                send_push_notification.delay(user.fcm_token, tmpl["push_title"], _render(tmpl["push_body"], **vars))
+                pushes.append({
+                    "fcm_token": user.fcm_token,
+                    "title": tmpl["push_title"],
+                    "body": _render(tmpl["push_body"], **vars),
+                })
             if user.phone:
                 send_sms.delay(user.phone, _render(tmpl["sms"], **vars))
 
         db.commit()
+        if pushes:
+            send_push_batch.delay(pushes)
         logger.info(f"Sent {len(bookings)} booking reminders")
     except Exception as e:
         db.rollback()
@@ -433,7 +517,7 @@ def send_review_requests():
             )
         ).scalars().all()
 
-        sent = 0
+        pushes = []
         for booking in bookings:
             # Skip if already reviewed
             existing_review = db.execute(
@@ -449,16 +533,17 @@ def send_review_requests():
             tmpl = TEMPLATES["REVIEW_REQUEST"]
             vars = {"booking_number": booking.booking_number}
 
-            send_push_notification.delay(
-                user.fcm_token,
-                tmpl["push_title"],
-                _render(tmpl["push_body"], **vars),
-                {"booking_id": str(booking.id), "type": "REVIEW_REQUEST"},
-            )
-            sent += 1
+            pushes.append({
+                "fcm_token": user.fcm_token,
+                "title": tmpl["push_title"],
+                "body": _render(tmpl["push_body"], **vars),
+                "data": {"booking_id": str(booking.id), "type": "REVIEW_REQUEST"},
+            })
 
         db.commit()
-        logger.info(f"Sent {sent} review requests")
+        if pushes:
+            send_push_batch.delay(pushes)
+        logger.info(f"Sent {len(pushes)} review requests")
     except Exception as e:
         db.rollback()
         logger.exception(f"send_review_requests failed: {e}")
@@ -16,6 +16,8 @@ from celery import Task
 from sqlalchemy import create_engine, select, update
 from sqlalchemy.orm import sessionmaker
 
+from config.razorpay_client import get_razorpay_client
+from config.redis_client import RELEASE_SLOT_LUA
 from config.settings import settings
 from tasks.celery_app import celery_app
 
@@ -32,12 +34,6 @@ def _get_sync_session():
     return Session()
 
 
-def _get_razorpay():
-    """Get authenticated Razorpay client."""
-    import razorpay
-    return razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-
-
 # ── Payout Tasks ───────────────────────────────────────────────────────────────
 
 @celery_app.task(bind=True, max_retries=5, default_retry_delay=300)
@@ -93,7 +89,7 @@ def process_single_payout(self, payment_id: str):
 
         # Razorpay Payouts API
         # NOTE: Requires Razorpay X (Current Account) — enable in Razorpay dashboard
-        client = _get_razorpay()
+        client = get_razorpay_client()
         payout_response = client.payout.create({
             "account_number": settings.RAZORPAY_ACCOUNT_NUMBER,
             "amount": payout_amount_paise,
@@ -218,7 +214,7 @@ def process_refund(self, payment_id: str, amount: float | None = None, reason: s
 
         refund_amount_paise = int((amount or float(payment.amount)) * 100)
 
-        client = _get_razorpay()
+        client = get_razorpay_client()
         refund = client.payment.refund(
             payment.razorpay_payment_id,
             {
@@ -292,12 +288,12 @@ def release_expired_slot_locks():
                 from_status=prev_status,
                 to_status=BookingStatus.CANCELLED,
                 reason="Payment window expired — auto-cancelled by system",
-                metadata={"cancelled_by": "system", "task": "release_expired_slot_locks"},
+                metadata_={"cancelled_by": "system", "task": "release_expired_slot_locks"},
             ))
 
             # Release Redis slot lock (belt+suspenders — TTL should have expired it already)
             slot_key = f"slot_lock:{booking.pandit_id}:{booking.scheduled_at.isoformat()}"
-            r.delete(slot_key)
+            r.eval(RELEASE_SLOT_LUA, 1, slot_key, str(booking.id))
 
             logger.info(f"Auto-cancelled expired booking: {booking.booking_number}")
 
@@ -10,6 +10,8 @@ import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
+import config.redis_client as redis_state
+from config.redis_client import RedisCache
 from shared.models.models import (
     Booking, BookingStatus, PanditProfile, Payment, PaymentStatus,
     Pooja, User, UserRole, VerificationStatus,
@@ -345,3 +347,62 @@ async def test_audit_log_is_populated_after_action(
     assert response.status_code == 200
     logs = response.json()["items"]
     assert any(log["action"] == "VERIFY_PANDIT" for log in logs)
+
+
+# ── Geo Sync ───────────────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_bulk_location_load_spans_chunks():
+    """add_pandit_locations_bulk loads every member when items span several GEOADD chunks."""
+    redis = redis_state.redis_client
+    key = f"test_geo:{uuid.uuid4().hex}"
+    items = [(str(uuid.uuid4()), 77.0 + i / 100, 28.0 + i / 100) for i in range(5)]
+    try:
+        await RedisCache(redis).add_pandit_locations_bulk(items, chunk_size=2, key=key)
+        assert await redis.zcard(key) == 5
+    finally:
+        await redis.delete(key)
+
+
+@pytest.mark.asyncio
+async def test_admin_geo_sync_replaces_set(
+    client: AsyncClient,
+    admin_user: User,
+    pandit_profile: PanditProfile,
+    db: AsyncSession,
+):
+    """Geo sync leaves exactly the verified pandits with a location in pandits_geo."""
+    pandit_profile.location = "SRID=4326;POINT(82.9739 25.3176)"
+    suspended_user = User(
+        id=uuid.uuid4(), email="suspended_pandit@test.com", name="Suspended Pandit",
+        oauth_provider="google", oauth_id="suspended_pandit_google", role="pandit", is_active=True,
+    )
+    db.add(suspended_user)
+    suspended = PanditProfile(
+        id=uuid.uuid4(),
+        user_id=suspended_user.id,
+        city="Varanasi",
+        verification_status=VerificationStatus.SUSPENDED,
+        is_available=False,
+        base_fee=1500,
+        location="SRID=4326;POINT(82.9800 25.3200)",
+    )
+    db.add(suspended)
+    await db.commit()
+
+    redis = redis_state.redis_client
+    stale_id = str(uuid.uuid4())
+    await redis.geoadd("pandits_geo", [82.97, 25.31, stale_id, 82.98, 25.32, str(suspended.id)])
+
+    response = await client.post("/admin/pandits/geo-sync", headers=auth_headers(admin_user))
+    assert response.status_code == 200
+
+    assert await redis.zscore("pandits_geo", str(pandit_profile.id)) is not None
+    assert await redis.zscore("pandits_geo", str(suspended.id)) is None
+    assert await redis.zscore("pandits_geo", stale_id) is None
+
+
+@pytest.mark.asyncio
+async def test_non_admin_cannot_sync_geo(client: AsyncClient, pandit_user: User):
+    response = await client.post("/admin/pandits/geo-sync", headers=auth_headers(pandit_user))
+    assert response.status_code == 403
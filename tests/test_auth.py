@@ -3,10 +3,15 @@ tests/test_auth.py
 Tests for authentication: JWT, refresh tokens, logout, /me endpoint.
 """
 
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from shared.models.models import User
+from shared.models.models import RefreshToken, User
+from shared.utils.security import create_refresh_token, hash_token, legacy_hash_token
 from tests.conftest import auth_headers
 
 
@@ -84,6 +89,74 @@ async def test_logout_invalidates_token(client: AsyncClient, user: User):
     assert r2.status_code in (200, 401)
 
 
+# ── Refresh Tokens ─────────────────────────────────────────────────────────────
+
+async def _store_refresh_token(db: AsyncSession, user: User, token_hash: str) -> RefreshToken:
+    db_token = RefreshToken(
+        user_id=user.id,
+        token_hash=token_hash,
+        expires_at=datetime.now(timezone.utc) + timedelta(days=1),
+    )
+    db.add(db_token)
+    await db.commit()
+    return db_token
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_round_trip(client: AsyncClient, user: User, db: AsyncSession):
+    """A stored refresh token is found by its hash, revoked, and replaced by a new one."""
+    raw, hashed = create_refresh_token()
+    assert hashed == hash_token(raw)
+    old = await _store_refresh_token(db, user, hashed)
+
+    response = await client.post("/auth/refresh", json={"refresh_token": raw})
+    assert response.status_code == 200
+    assert response.json()["access_token"]
+
+    await db.refresh(old)
+    assert old.is_revoked
+
+    # The rotated token is stored under its BLAKE2b hash and works in turn
+    new_raw = response.cookies["refresh_token"]
+    stored = await db.scalar(select(RefreshToken).where(RefreshToken.token_hash == hash_token(new_raw)))
+    assert stored is not None and not stored.is_revoked
+
+    reused = await client.post("/auth/refresh", json={"refresh_token": raw})
+    assert reused.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_refresh_accepts_legacy_sha256_hash(client: AsyncClient, user: User, db: AsyncSession):
+    """Tokens stored before the BLAKE2b switch still refresh, and rotate onto the new hash."""
+    raw, _ = create_refresh_token()
+    await _store_refresh_token(db, user, legacy_hash_token(raw))
+
+    response = await client.post("/auth/refresh", json={"refresh_token": raw})
+    assert response.status_code == 200
+
+    new_raw = response.cookies["refresh_token"]
+    assert await db.scalar(select(RefreshToken.id).where(RefreshToken.token_hash == hash_token(new_raw)))
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_refresh_token(client: AsyncClient, user: User, db: AsyncSession):
+    """Logout revokes the cookie's refresh token, so it can no longer be exchanged."""
+    raw, hashed = create_refresh_token()
+    db_token = await _store_refresh_token(db, user, hashed)
+
+    logout = await client.post(
+        "/auth/logout",
+        headers={**auth_headers(user), "Cookie": f"refresh_token={raw}"},
+    )
+    assert logout.status_code == 200
+
+    await db.refresh(db_token)
+    assert db_token.is_revoked
+
+    response = await client.post("/auth/refresh", json={"refresh_token": raw})
+    assert response.status_code == 401
+
+
 @pytest.mark.asyncio
 async def test_health_endpoint(client: AsyncClient):
     """Health check is public and returns ok status."""
@@ -3,14 +3,19 @@ tests/test_notifications.py
 Tests for in-app notification management: listing, marking as read, unread count.
 """
 
+import asyncio
 import uuid
 from datetime import datetime, timezone
 
+import orjson
 import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from shared.models.models import Notification, NotificationType, User
+from services.notification.router import _hub
+from shared.models.models import (
+    Notification, NotificationType, PanditProfile, User, VerificationStatus,
+)
 from tests.conftest import auth_headers
 
 
@@ -173,3 +178,55 @@ async def test_cannot_read_other_users_notification(
 async def test_notifications_requires_auth(client: AsyncClient):
     response = await client.get("/notifications")
     assert response.status_code == 401
+
+
+# ── WebSocket Delivery ─────────────────────────────────────────────────────────
+
+class _FakeSocket:
+    """Stands in for a connected /notifications/ws client on this worker's hub."""
+
+    def __init__(self):
+        self.messages: asyncio.Queue = asyncio.Queue()
+
+    async def send_text(self, data):
+        await self.messages.put(data)
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_ws_receives_notification_from_admin_verify(
+    client: AsyncClient, admin_user: User, pandit_user: User, db: AsyncSession
+):
+    """A notification written by a real endpoint reaches the user's socket after commit."""
+    pending = PanditProfile(
+        id=uuid.uuid4(),
+        user_id=pandit_user.id,
+        city="Varanasi",
+        verification_status=VerificationStatus.PENDING,
+        is_available=False,
+        base_fee=1500,
+    )
+    db.add(pending)
+    await db.commit()
+
+    socket = _FakeSocket()
+    _hub.connect(str(pandit_user.id), socket)
+    try:
+        await asyncio.sleep(0.1)  # let the hub's pattern subscription land
+        response = await client.post(
+            f"/admin/pandits/{pending.id}/verify",
+            headers=auth_headers(admin_user),
+            json={"notes": "Approved."},
+        )
+        assert response.status_code == 200
+
+        message = orjson.loads(await asyncio.wait_for(socket.messages.get(), timeout=5))
+    finally:
+        _hub.disconnect(str(pandit_user.id), socket)
+
+    assert message["type"] == NotificationType.ACCOUNT_VERIFIED.value
+    assert message["is_read"] is False
+
+    # The pushed id is the committed row the list endpoint returns
+    listed = await client.get("/notifications", headers=auth_headers(pandit_user))
+    assert message["id"] in [n["id"] for n in listed.json()["items"]]
@@ -4,12 +4,14 @@ Tests for pandit profile management, availability, and public profile visibility
 """
 
 import uuid
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta, timezone
 
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from shared.models.models import PanditProfile, User, VerificationStatus
+from shared.models.models import PanditAvailability, PanditProfile, User, VerificationStatus
 from tests.conftest import auth_headers
 
 
@@ -102,6 +104,43 @@ async def test_set_availability_slots(
     assert response.status_code == 200
 
 
+@pytest.mark.asyncio
+async def test_set_availability_skips_existing_slots(
+    client: AsyncClient, pandit_user: User, pandit_profile: PanditProfile, db: AsyncSession
+):
+    """Re-sent slots hit the unique constraint and are skipped, never duplicated or overwritten."""
+    tomorrow = date.today() + timedelta(days=1)
+    booked = PanditAvailability(
+        id=uuid.uuid4(),
+        pandit_id=pandit_profile.id,
+        date=datetime(tomorrow.year, tomorrow.month, tomorrow.day, tzinfo=timezone.utc),
+        start_time="09:00",
+        end_time="11:00",
+        is_booked=True,
+    )
+    db.add(booked)
+    await db.commit()
+
+    slot = {"date": tomorrow.isoformat(), "start_time": "09:00", "end_time": "11:00"}
+    other = {"date": tomorrow.isoformat(), "start_time": "14:00", "end_time": "17:00"}
+    for payload in ({"slots": [slot, other]}, {"slots": [other, other]}):
+        response = await client.put(
+            "/pandits/me/availability",
+            headers=auth_headers(pandit_user),
+            json=payload,
+        )
+        assert response.status_code == 200
+
+    count = await db.scalar(
+        select(func.count()).select_from(PanditAvailability)
+        .where(PanditAvailability.pandit_id == pandit_profile.id)
+    )
+    assert count == 2
+
+    await db.refresh(booked)
+    assert booked.is_booked
+
+
 @pytest.mark.asyncio
 async def test_get_pandit_calendar(
     client: AsyncClient, pandit_user: User, pandit_profile: PanditProfile
@@ -5,6 +5,7 @@ Tests for review creation, rating validation, flagging, and admin moderation.
 
 import uuid
 from datetime import datetime, timedelta, timezone
+from decimal import ROUND_HALF_UP, Decimal
 
 import pytest
 from httpx import AsyncClient
@@ -227,3 +228,59 @@ async def test_non_admin_cannot_delete_review(
 
     response = await client.delete(f"/reviews/{review_id}", headers=auth_headers(user))
     assert response.status_code == 403
+
+
+# ── Rating Aggregate ───────────────────────────────────────────────────────────
+
+async def _assert_rating(db: AsyncSession, profile: PanditProfile, total: int, count: int):
+    await db.refresh(profile)
+    assert profile.rating_sum == total
+    assert profile.rating_count == count
+    expected = (Decimal(total) / count).quantize(Decimal("0.01"), ROUND_HALF_UP) if count else Decimal("0")
+    assert Decimal(profile.rating_avg) == expected
+
+
+@pytest.mark.asyncio
+async def test_rating_aggregate_follows_create_hide_restore(
+    client: AsyncClient,
+    user: User,
+    admin_user: User,
+    pandit_profile: PanditProfile,
+    pooja: Pooja,
+    db: AsyncSession,
+):
+    """rating_sum/count/avg move by exactly one review on create, hide and restore."""
+    await db.refresh(pandit_profile)
+    base_sum, base_count = pandit_profile.rating_sum, pandit_profile.rating_count
+
+    review_ids = []
+    for rating in (5, 2):
+        booking = _make_booking(user.id, pandit_profile.id, pooja.id)
+        db.add(booking)
+        await db.commit()
+        r = await client.post(
+            "/reviews",
+            headers=auth_headers(user),
+            json={"booking_id": str(booking.id), "rating": rating, "comment": "Rated"},
+        )
+        assert r.status_code == 201
+        review_ids.append(r.json()["id"])
+    await _assert_rating(db, pandit_profile, base_sum + 7, base_count + 2)
+
+    # Hiding takes the 2 out; repeating the hide changes nothing
+    for _ in range(2):
+        r = await client.delete(f"/reviews/{review_ids[1]}", headers=auth_headers(admin_user))
+        assert r.status_code == 200
+    await _assert_rating(db, pandit_profile, base_sum + 5, base_count + 1)
+
+    # Restoring folds it back in, once
+    for _ in range(2):
+        r = await client.post(f"/reviews/{review_ids[1]}/restore", headers=auth_headers(admin_user))
+        assert r.status_code == 200
+    await _assert_rating(db, pandit_profile, base_sum + 7, base_count + 2)
+
+
+@pytest.mark.asyncio
+async def test_restore_nonexistent_review_returns_404(client: AsyncClient, admin_user: User):
+    response = await client.post(f"/reviews/{uuid.uuid4()}/restore", headers=auth_headers(admin_user))
+    assert response.status_code == 404